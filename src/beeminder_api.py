@@ -3,8 +3,81 @@ Beeminder API Client
 A simple wrapper for the Beeminder API
 """
 
+import os
+import time
+import threading
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Short-lived on-disk cache of GET responses, shared between CLI runs
+CACHE_FILE = os.path.expanduser("~/.beeminder-cache")
+CACHE_TTL = 120
+
+def _make_session() -> requests.Session:
+    """Create the HTTP session, cached when requests-cache is installed"""
+    if requests_cache is None:
+        return requests.Session()
+    return requests_cache.CachedSession(
+        cache_name=CACHE_FILE,
+        backend='sqlite',
+        expire_after=CACHE_TTL,
+        allowable_methods=('GET',),
+        ignored_parameters=['auth_token'],
+        stale_if_error=True
+    )
+
+def clear_cache() -> None:
+    """Drop all cached responses"""
+    if requests_cache is not None:
+        _make_session().cache.clear()
+
+class TokenBucket:
+    """Thread-safe token bucket used to throttle outgoing requests"""
+
+    def __init__(self, capacity: int, refill_per_sec: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.refill_per_sec)
+            self.last = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.refill_per_sec)
+                self.tokens = 1
+                self.last = time.monotonic()
+            self.tokens -= 1
+
+class ThrottledAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token before each request it sends over the network,
+    so responses served from the local cache are never throttled"""
+
+    def __init__(self, limiter: TokenBucket, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
 
 class BeeminderAPI:
     BASE_URL = "https://www.beeminder.com/api/v1"
@@ -12,24 +85,86 @@ class BeeminderAPI:
     def __init__(self, username: str, auth_token: str):
         self.username = username
         self.auth_token = auth_token
+        self._user_url = f"{self.BASE_URL}/users/{username}"
 
-    def get_goals(self) -> List[Dict]:
-        url = f"{self.BASE_URL}/users/{self.username}/goals.json"
-        params = {'auth_token': self.auth_token}
-        response = requests.get(url, params=params)
+        # One keep-alive session for every call so back-to-back requests
+        # reuse the same connection instead of doing a new TLS handshake
+        self._session = _make_session()
+        self._session.params = {'auth_token': auth_token}
+        # Advertise every encoding urllib3 can decode here (adds br when brotli is installed)
+        self._session.headers.update({'Accept-Encoding': ACCEPT_ENCODING,
+                                      'User-Agent': 'beeminder-scheduler/1.0'})
+        # Retry throttling and transient server errors, sleeping for
+        # Retry-After when given and backing off exponentially otherwise
+        retries = Retry(total=5, backoff_factor=0.5,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        respect_retry_after_header=True)
+        # Stay below Beeminder's rate limit rather than retrying on 429
+        self._limiter = TokenBucket(capacity=5, refill_per_sec=5)
+        self._session.mount("https://", ThrottledAdapter(self._limiter, pool_connections=4,
+                                                         pool_maxsize=16, max_retries=retries))
+
+        # Last ETag and parsed body per URL, for conditional re-fetches
+        self._etags: Dict[str, tuple] = {}
+
+        self._warmup: Optional[threading.Thread] = None
+
+    def warm_up(self) -> None:
+        """Open the pooled connection in the background, so the first real
+        request doesn't pay for the TLS handshake. Only the first call does anything."""
+        if self._warmup is None:
+            self._warmup = threading.Thread(target=self._send_warm_up, daemon=True)
+            self._warmup.start()
+
+    def _send_warm_up(self) -> None:
+        try:
+            self._session.head(self.BASE_URL, timeout=2)
+        except requests.RequestException:
+            pass
+
+    def _get_json(self, url: str):
+        """GET a JSON resource, reusing the parsed body when the server answers 304"""
+        cached = self._etags.get(url)
+        headers = {'If-None-Match': cached[0]} if cached else None
+        response = self._session.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
         response.raise_for_status()
-        return response.json()
+        data = orjson.loads(response.content) if orjson else response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etags[url] = (etag, data)
+        return data
+
+    def get_goals(self) -> List[Dict]:
+        url = f"{self._user_url}/goals.json"
+        return self._get_json(url)
 
     def get_goal(self, slug: str) -> Dict:
-        url = f"{self.BASE_URL}/users/{self.username}/goals/{slug}.json"
-        params = {'auth_token': self.auth_token}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        url = f"{self._user_url}/goals/{slug}.json"
+        return self._get_json(url)
+
+    def get_goals_bulk(self, slugs: Iterable[str]) -> Dict[str, Union[Dict, Exception]]:
+        """Fetch several goals concurrently over the shared session.
+        A goal that fails to load maps to the exception it raised."""
+        slugs = list(slugs)
+        if not slugs:
+            return {}
+
+        def fetch(slug: str) -> Union[Dict, Exception]:
+            try:
+                return self.get_goal(slug)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(8, len(slugs))) as ex:
+            return dict(zip(slugs, ex.map(fetch, slugs)))
 
     def test_auth(self) -> bool:
+        """Check the credentials with a bodyless request for the user resource"""
+        url = f"{self._user_url}.json"
         try:
-            self.get_goals()
-            return True
-        except:
+            response = self._session.head(url, allow_redirects=False)
+            return response.status_code < 400
+        except requests.RequestException:
             return False
@@ -4,35 +4,76 @@ Interactive command-line interface for the Beeminder Scheduler
 """
 
 import os
+import sys
+
+CONFIG_FILE = os.path.expanduser("~/.beeminder-schedule.json")
+
+# `where` only prints a path, so answer it before importing click and rich
+if __name__ == '__main__' and sys.argv[1:] == ['where']:
+    print(f"Configuration file: {CONFIG_FILE}")
+    sys.exit(0)
+
 import json
+import functools
 import click
-from typing import Dict
+from typing import Dict, Optional
+from rich.markup import escape
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-from beeminder_api import BeeminderAPI
+from beeminder_api import BeeminderAPI, clear_cache
 from scheduler import BeeminderScheduler
-from ui import console, get_credentials, display_goals, display_scheduled_goals, display_requirements, display_schedule
-from interactive import start_interactive_mode
-from llm_scheduler import LLMScheduler
-from google_calendar import GoogleCalendarAPI, setup_google_calendar
+from schedule_utils import default_start_time, write_file_atomic
+from ui import console, print_table, get_credentials, display_goals, display_scheduled_goals, display_requirements, display_schedule
 
-CONFIG_FILE = os.path.expanduser("~/.beeminder-schedule.json")
+# Parsed config per path, together with the mtime it was read at
+_CONFIG_CACHE: Dict[str, tuple] = {}
 
 def load_config() -> Dict:
-    """Load config from file"""
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    """Load config from file, reusing the parsed copy while the file is unchanged"""
+    try:
+        mtime = os.stat(CONFIG_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    cached = _CONFIG_CACHE.get(CONFIG_FILE)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(CONFIG_FILE, 'rb') as f:
+        config = orjson.loads(f.read()) if orjson else json.load(f)
+    _CONFIG_CACHE[CONFIG_FILE] = (mtime, config)
+    return config
 
 def save_config(config: Dict) -> None:
-    """Save config to file"""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    """Save config to file via a temp file, so an interrupted save can't truncate it"""
+    data = orjson.dumps(config, option=orjson.OPT_INDENT_2) if orjson else json.dumps(config, indent=2).encode()
+    write_file_atomic(CONFIG_FILE, data)
+    _CONFIG_CACHE[CONFIG_FILE] = (os.stat(CONFIG_FILE).st_mtime_ns, config)
+
+def needs_api(fn):
+    """Pass the command a BeeminderAPI and BeeminderScheduler built from the saved credentials"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        obj = click.get_current_context().ensure_object(dict)
+        if 'api' not in obj:
+            username, auth_token = get_credentials(CONFIG_FILE, load_config())
+            if not username or not auth_token:
+                return
+            obj['api'] = BeeminderAPI(username, auth_token)
+            obj['scheduler'] = BeeminderScheduler(obj['api'])
+        return fn(obj['api'], obj['scheduler'], *args, **kwargs)
+    return wrapper
 
 @click.group()
-def cli():
+@click.option('--no-cache', is_flag=True, help='Ignore cached Beeminder responses')
+def cli(no_cache):
     """Beeminder Scheduler - Create calendar events from Beeminder goals"""
-    pass
+    if no_cache:
+        clear_cache()
 
 # Global flag to show config file path
 @cli.command(help="Show config file path and exit")
@@ -43,20 +84,14 @@ def where():
 @cli.command()
 def setup():
     """Set up Beeminder credentials"""
-    username, auth_token = get_credentials(CONFIG_FILE)
+    username, auth_token = get_credentials(CONFIG_FILE, load_config())
     if username and auth_token:
         console.print("[bold green]✓ Setup complete![/bold green]")
 
 @cli.command()
-def goals():
+@needs_api
+def goals(api, scheduler):
     """List all Beeminder goals"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
-
     try:
         console.print("[bold]Fetching your Beeminder goals...[/bold]")
         all_goals = api.get_goals()
@@ -67,15 +102,9 @@ def goals():
         console.print(f"[bold red]❌ Error fetching goals: {e}[/bold red]")
 
 @cli.command()
-def scheduled():
+@needs_api
+def scheduled(api, scheduler):
     """List goals configured for scheduling"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
-
     try:
         goals = scheduler.get_scheduled_goals()
         display_scheduled_goals(goals)
@@ -87,15 +116,9 @@ def scheduled():
 @click.argument('slug')
 @click.option('--name', help='Calendar event name')
 @click.option('--hours', type=float, help='Hours per unit')
-def add(slug, name, hours):
+@needs_api
+def add(api, scheduler, slug, name, hours):
     """Add a goal to the scheduling system"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
-
     try:
         # Verify goal exists
         try:
@@ -108,22 +131,16 @@ def add(slug, name, hours):
         hours_per_unit = hours or 1.0
 
         scheduler.add_goal(slug, calendar_name, hours_per_unit)
-        console.print(f"[bold green]✓ Added '{slug}' to scheduling as '{calendar_name}'[/bold green]")
+        console.print(f"[bold green]✓ Added '{slug}' to scheduling as '{escape(calendar_name)}'[/bold green]")
         console.print(f"[dim]Time conversion: {hours_per_unit} hours per unit[/dim]")
     except Exception as e:
         console.print(f"[bold red]❌ Error: {e}[/bold red]")
 
 @cli.command()
 @click.argument('slug')
-def remove(slug):
+@needs_api
+def remove(api, scheduler, slug):
     """Remove a goal from scheduling"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
-
     try:
         scheduler.remove_goal(slug)
         console.print(f"[bold green]✓ Removed '{slug}' from scheduling[/bold green]")
@@ -131,15 +148,9 @@ def remove(slug):
         console.print(f"[bold red]❌ Error: {e}[/bold red]")
 
 @cli.command()
-def requirements():
+@needs_api
+def requirements(api, scheduler):
     """Show scheduling requirements for today"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
-
     try:
         requirements_data = scheduler.calculate_requirements()
         display_requirements(requirements_data)
@@ -171,14 +182,12 @@ def config():
         console.print(f"[dim]Run the setup command or add a goal to create the configuration file[/dim]")
 
 @cli.command()
-def interactive():
+@needs_api
+def interactive(api, scheduler):
     """Launch interactive mode"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
+    # The menu waits for input before its first request, so the handshake is free here
+    api.warm_up()
+    from interactive import start_interactive_mode
 
     try:
         start_interactive_mode(api, scheduler)
@@ -187,59 +196,56 @@ def interactive():
     except Exception as e:
         console.print(f"[bold red]❌ Error: {e}[/bold red]")
 
-@cli.command()
-@click.option('--start-time', '-s', help='Start time for the schedule (e.g., "9:00 AM")')
-@click.option('--end-time', '-e', help='End time for the schedule (optional)')
-@click.option('--preferences', '-p', help='Special preferences or context for scheduling')
-def schedule(start_time, end_time, preferences):
-    """Generate a daily schedule from Beeminder goals"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
+def _generate_schedule(api: BeeminderAPI, scheduler: BeeminderScheduler,
+                       start_time: Optional[str], end_time: Optional[str],
+                       preferences: Optional[str]) -> Optional[str]:
+    """Fetch requirements and ask the LLM for a schedule; None if there is nothing to show"""
+    from llm_scheduler import LLMScheduler
 
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
     llm_scheduler = LLMScheduler(api, scheduler)
 
     # Default start time to current rounded time if not provided
     if not start_time:
-        from datetime import datetime
-        now = datetime.now()
-        minutes = now.minute
-        rounded_minutes = ((minutes + 14) // 15) * 15
-        if rounded_minutes >= 60:
-            rounded_time = now.replace(hour=now.hour + 1, minute=0, second=0, microsecond=0)
-        else:
-            rounded_time = now.replace(minute=rounded_minutes, second=0, microsecond=0)
-        start_time = rounded_time.strftime("%I:%M %p").lstrip('0')
+        start_time = default_start_time()
         console.print(f"[dim]Using default start time: {start_time}[/dim]")
 
-    try:
-        console.print("[bold]Fetching your Beeminder requirements...[/bold]")
-        requirements = scheduler.calculate_requirements()
+    console.print("[bold]Fetching your Beeminder requirements...[/bold]")
+    requirements = scheduler.calculate_requirements()
 
-        if not requirements:
-            console.print("[bold yellow]No scheduled goals found.[/bold yellow]")
-            console.print("[dim]Add goals for scheduling first before generating a schedule.[/dim]")
-            return
+    if not requirements:
+        console.print("[bold yellow]No scheduled goals found.[/bold yellow]")
+        console.print("[dim]Add goals for scheduling first before generating a schedule.[/dim]")
+        return None
 
-        console.print(f"[dim]Found {len(requirements)} goals to schedule[/dim]")
+    console.print(f"[dim]Found {len(requirements)} goals to schedule[/dim]")
 
-        # Check if API key is configured
-        api_key = llm_scheduler.config.get('api_key', '')
+    # Check if API key is configured
+    api_key = llm_scheduler.config.get('api_key', '')
+    if not api_key:
+        console.print("[yellow]API key not set up yet.[/yellow]")
+        api_key = llm_scheduler.setup_api_key()
         if not api_key:
-            console.print("[yellow]API key not set up yet.[/yellow]")
-            api_key = llm_scheduler.setup_api_key()
-            if not api_key:
-                return
+            return None
 
-        console.print("[bold]Generating your schedule...[/bold]")
-        schedule_text = llm_scheduler.generate_schedule(
-            requirements,
-            start_time,
-            end_time,
-            preferences or ""
-        )
+    console.print("[bold]Generating your schedule...[/bold]")
+    return llm_scheduler.generate_schedule(
+        requirements,
+        start_time,
+        end_time,
+        preferences or ""
+    )
+
+@cli.command()
+@click.option('--start-time', '-s', help='Start time for the schedule (e.g., "9:00 AM")')
+@click.option('--end-time', '-e', help='End time for the schedule (optional)')
+@click.option('--preferences', '-p', help='Special preferences or context for scheduling')
+@needs_api
+def schedule(api, scheduler, start_time, end_time, preferences):
+    """Generate a daily schedule from Beeminder goals"""
+    try:
+        schedule_text = _generate_schedule(api, scheduler, start_time, end_time, preferences)
+        if schedule_text is None:
+            return
 
         display_schedule(schedule_text)
 
@@ -255,18 +261,23 @@ def gcal():
 @gcal.command()
 def setup():
     """Set up Google Calendar integration"""
+    from google_calendar import setup_google_calendar
+
     console.print("[bold cyan]Google Calendar Setup[/bold cyan]")
     setup_google_calendar()
 
 @gcal.command()
-def calendars():
+@click.option('--refresh', is_flag=True, help='Fetch the calendar list from Google instead of the local cache')
+def calendars(refresh):
     """List available Google Calendars"""
+    from google_calendar import GoogleCalendarAPI
+
     api = GoogleCalendarAPI()
     if not api.authenticate():
         console.print("[bold red]❌ Failed to authenticate with Google Calendar[/bold red]")
         return
 
-    calendars = api.get_calendar_list()
+    calendars = api.get_calendar_list(refresh=refresh)
 
     if not calendars:
         console.print("[yellow]No calendars found[/yellow]")
@@ -275,6 +286,7 @@ def calendars():
     console.print("[bold]Your Google Calendars:[/bold]")
 
     from rich.table import Table
+    from rich.text import Text
     from rich import box
 
     table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
@@ -287,11 +299,11 @@ def calendars():
         table.add_row(
             str(i),
             calendar.get('id', ''),
-            calendar.get('summary', ''),
+            Text(calendar.get('summary', '')),
             "✓" if calendar.get('primary', False) else ""
         )
 
-    console.print(table)
+    print_table(table)
 
     # Save primary calendar ID for future use
     config = load_config()
@@ -307,9 +319,10 @@ def calendars():
 @click.option('--calendar-id', '-c', help='Google Calendar ID to use')
 def push(calendar_id):
     """Push the last generated schedule to Google Calendar"""
-    # Get the last generated schedule
-    from interactive import get_last_schedule
+    from google_calendar import GoogleCalendarAPI
+    from schedule_utils import get_last_schedule
 
+    # Get the last generated schedule
     schedule_text = get_last_schedule()
     if not schedule_text:
         console.print("[yellow]No recently generated schedule found[/yellow]")
@@ -348,63 +361,23 @@ def push(calendar_id):
 @click.option('--preferences', '-p', help='Special preferences or context for scheduling')
 @click.option('--push-to-calendar', '-c', is_flag=True, help='Push schedule to Google Calendar')
 @click.option('--calendar-id', help='Google Calendar ID to use')
-def today(start_time, end_time, preferences, push_to_calendar, calendar_id):
+@needs_api
+def today(api, scheduler, start_time, end_time, preferences, push_to_calendar, calendar_id):
     """Generate a schedule and optionally push to Google Calendar"""
-    username, auth_token = get_credentials(CONFIG_FILE)
-    if not username or not auth_token:
-        return
-
-    api = BeeminderAPI(username, auth_token)
-    scheduler = BeeminderScheduler(api)
-    llm_scheduler = LLMScheduler(api, scheduler)
-
-    # Default start time to current rounded time if not provided
-    if not start_time:
-        from datetime import datetime
-        now = datetime.now()
-        minutes = now.minute
-        rounded_minutes = ((minutes + 14) // 15) * 15
-        if rounded_minutes >= 60:
-            rounded_time = now.replace(hour=now.hour + 1, minute=0, second=0, microsecond=0)
-        else:
-            rounded_time = now.replace(minute=rounded_minutes, second=0, microsecond=0)
-        start_time = rounded_time.strftime("%I:%M %p").lstrip('0')
-        console.print(f"[dim]Using default start time: {start_time}[/dim]")
-
     try:
-        console.print("[bold]Fetching your Beeminder requirements...[/bold]")
-        requirements = scheduler.calculate_requirements()
-
-        if not requirements:
-            console.print("[bold yellow]No scheduled goals found.[/bold yellow]")
-            console.print("[dim]Add goals for scheduling first before generating a schedule.[/dim]")
+        schedule_text = _generate_schedule(api, scheduler, start_time, end_time, preferences)
+        if schedule_text is None:
             return
 
-        console.print(f"[dim]Found {len(requirements)} goals to schedule[/dim]")
-
-        # Check if API key is configured
-        api_key = llm_scheduler.config.get('api_key', '')
-        if not api_key:
-            console.print("[yellow]API key not set up yet.[/yellow]")
-            api_key = llm_scheduler.setup_api_key()
-            if not api_key:
-                return
-
-        console.print("[bold]Generating your schedule...[/bold]")
-        schedule_text = llm_scheduler.generate_schedule(
-            requirements,
-            start_time,
-            end_time,
-            preferences or ""
-        )
-
-        from interactive import save_last_schedule
+        from schedule_utils import save_last_schedule
         save_last_schedule(schedule_text)
 
         display_schedule(schedule_text)
 
         # Push to Google Calendar if requested
         if push_to_calendar:
+            from google_calendar import GoogleCalendarAPI
+
             # Get calendar ID
             if not calendar_id:
                 config = load_config()
@@ -415,13 +388,13 @@ def today(start_time, end_time, preferences, push_to_calendar, calendar_id):
                     console.print("[dim]Run 'gcal calendars' to set a default or specify with --calendar-id[/dim]")
                     return
 
-            api = GoogleCalendarAPI()
-            if not api.authenticate():
+            gcal_api = GoogleCalendarAPI()
+            if not gcal_api.authenticate():
                 console.print("[bold red]❌ Failed to authenticate with Google Calendar[/bold red]")
                 return
 
             console.print("[bold]Pushing schedule to Google Calendar...[/bold]")
-            events_created, errors = api.push_schedule_to_calendar(schedule_text, calendar_id)
+            events_created, errors = gcal_api.push_schedule_to_calendar(schedule_text, calendar_id)
 
             if events_created > 0:
                 console.print(f"[bold green]✓ Successfully created {events_created} calendar events![/bold green]")
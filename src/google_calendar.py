@@ -6,26 +6,45 @@ Functions to create events in Google Calendar from scheduled Beeminder goals
 import os
 import json
 import datetime
-import re
+import functools
+import time
 from typing import Dict, List, Optional, Tuple
 import webbrowser
 
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from rich.console import Console
 
+from schedule_utils import parse_schedule_line, write_file_atomic
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 console = Console()
 
 # If modifying these scopes, delete your token.json file.
 SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/calendar.events']
 CLIENT_SECRETS_FILE = os.path.expanduser("~/.beeminder-gcal-credentials.json")
 TOKEN_FILE = os.path.expanduser("~/.beeminder-gcal-token.json")
+CALENDAR_CACHE_FILE = os.path.expanduser("~/.beeminder-gcal-calendars.json")
+CALENDAR_CACHE_TTL = 24 * 60 * 60  # Calendar lists rarely change
+LOCAL_TIMEZONE = time.tzname[0]
+BATCH_SIZE = 50  # Google's limit on requests per batch
+BREAK_WORDS = ('break', 'lunch')
+
+# Formats accepted by parse_time_string, most common first
+TIME_FORMATS = (
+    "%I:%M %p",  # "9:00 AM"
+    "%I:%M%p",   # "9:00AM"
+    "%I %p",     # "9 AM"
+)
 
 class GoogleCalendarAPI:
     """Interface to Google Calendar API"""
 
+    # Credentials parsed from TOKEN_FILE, with the file mtime they were read at
+    _creds_cache: Optional[Tuple[int, object]] = None
+
     def __init__(self):
         """Initialize the Google Calendar API client"""
         self.service = None
@@ -33,44 +52,53 @@ class GoogleCalendarAPI:
 
     def authenticate(self) -> bool:
         """Authenticate with Google Calendar API"""
+        # The Google client stack is slow to import, so only load it when needed
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+
         creds = None
 
         # The file token.json stores the user's access and refresh tokens
-        if os.path.exists(TOKEN_FILE):
+        try:
+            token_mtime = os.stat(TOKEN_FILE).st_mtime_ns
+        except FileNotFoundError:
+            token_mtime = None
+
+        cached = GoogleCalendarAPI._creds_cache
+        if token_mtime is not None and cached and cached[0] == token_mtime:
+            creds = cached[1]
+        elif token_mtime is not None:
             try:
-                creds = Credentials.from_authorized_user_info(
-                    json.load(open(TOKEN_FILE)), SCOPES)
+                with open(TOKEN_FILE, 'rb') as f:
+                    token_info = orjson.loads(f.read()) if orjson else json.load(f)
+                creds = Credentials.from_authorized_user_info(token_info, SCOPES)
+                GoogleCalendarAPI._creds_cache = (token_mtime, creds)
             except Exception as e:
                 console.print(f"[yellow]Error loading saved credentials: {e}[/yellow]")
 
         # If there are no valid credentials available, let the user log in.
         if not creds or not creds.valid:
+            refreshed = False
             if creds and creds.expired and creds.refresh_token:
                 try:
                     creds.refresh(Request())
+                    refreshed = True
                 except Exception:
-                    if not os.path.exists(CLIENT_SECRETS_FILE):
-                        console.print("[bold red]❌ Client secrets file not found.[/bold red]")
-                        console.print(f"Please create {CLIENT_SECRETS_FILE} with your Google Calendar API credentials.")
-                        return False
-
-                    try:
-                        flow = InstalledAppFlow.from_client_secrets_file(
-                            CLIENT_SECRETS_FILE, SCOPES)
-                        creds = flow.run_local_server(port=0)
-                    except Exception as e:
-                        console.print(f"[bold red]❌ Authentication failed: {e}[/bold red]")
-                        return False
-            else:
-                if not os.path.exists(CLIENT_SECRETS_FILE):
-                    console.print("[bold red]❌ Client secrets file not found.[/bold red]")
-                    console.print(f"Please create {CLIENT_SECRETS_FILE} with your Google Calendar API credentials.")
-                    return False
+                    pass
 
+            if not refreshed:
                 try:
                     flow = InstalledAppFlow.from_client_secrets_file(
                         CLIENT_SECRETS_FILE, SCOPES)
                     creds = flow.run_local_server(port=0)
+                    # The new login may be a different account, with different calendars
+                    clear_calendar_cache()
+                except FileNotFoundError:
+                    console.print("[bold red]❌ Client secrets file not found.[/bold red]")
+                    console.print(f"Please create {CLIENT_SECRETS_FILE} with your Google Calendar API credentials.")
+                    return False
                 except Exception as e:
                     console.print(f"[bold red]❌ Authentication failed: {e}[/bold red]")
                     return False
@@ -78,6 +106,7 @@ class GoogleCalendarAPI:
             # Save the credentials for the next run
             with open(TOKEN_FILE, 'w') as token:
                 token.write(creds.to_json())
+            GoogleCalendarAPI._creds_cache = (os.stat(TOKEN_FILE).st_mtime_ns, creds)
 
         try:
             self.service = build('calendar', 'v3', credentials=creds)
@@ -86,8 +115,18 @@ class GoogleCalendarAPI:
             console.print(f"[bold red]❌ Failed to create Google Calendar service: {e}[/bold red]")
             return False
 
-    def get_calendar_list(self) -> List[Dict]:
-        """Get list of available calendars"""
+    def get_calendar_list(self, refresh: bool = False) -> List[Dict]:
+        """Get list of available calendars (served from a day-old disk cache unless refresh is set)"""
+        if not refresh:
+            try:
+                with open(CALENDAR_CACHE_FILE, 'r') as f:
+                    cached = json.load(f)
+                if time.time() - cached['fetched'] < CALENDAR_CACHE_TTL:
+                    self.calendars = cached['items']
+                    return self.calendars
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
         if not self.service:
             if not self.authenticate():
                 return []
@@ -95,11 +134,37 @@ class GoogleCalendarAPI:
         try:
             calendar_list = self.service.calendarList().list().execute()
             self.calendars = calendar_list.get('items', [])
+            _save_calendar_cache(self.calendars)
             return self.calendars
         except Exception as e:
             console.print(f"[bold red]❌ Failed to fetch calendars: {e}[/bold red]")
             return []
 
+    def _build_event_body(self, summary: str, description: str, start_dt: datetime.datetime,
+                          end_dt: datetime.datetime, color_id: Optional[str] = None) -> Dict:
+        """Build the request body for a calendar event"""
+        # Handle end time being on the next day
+        if end_dt < start_dt:
+            end_dt = end_dt + datetime.timedelta(days=1)
+
+        event = {
+            'summary': summary,
+            'description': description,
+            'start': {
+                'dateTime': start_dt.isoformat(),
+                'timeZone': LOCAL_TIMEZONE,
+            },
+            'end': {
+                'dateTime': end_dt.isoformat(),
+                'timeZone': LOCAL_TIMEZONE,
+            },
+        }
+
+        if color_id:
+            event['colorId'] = color_id
+
+        return event
+
     def create_event(self, calendar_id: str, summary: str, start_time: str,
                     end_time: str, description: str = "", color_id: str = None) -> Optional[Dict]:
         """Create a calendar event"""
@@ -111,30 +176,7 @@ class GoogleCalendarAPI:
         try:
             start_dt = parse_time_string(start_time)
             end_dt = parse_time_string(end_time)
-
-            # Handle end time being on the next day
-            if end_dt < start_dt:
-                end_dt = end_dt + datetime.timedelta(days=1)
-
-            import time
-            local_timezone = time.tzname[0]
-
-            event = {
-                'summary': summary,
-                'description': description,
-                'start': {
-                    'dateTime': start_dt.isoformat(),
-                    'timeZone': local_timezone,
-                },
-                'end': {
-                    'dateTime': end_dt.isoformat(),
-                    'timeZone': local_timezone,
-                },
-            }
-
-            if color_id:
-                event['colorId'] = color_id
-
+            event = self._build_event_body(summary, description, start_dt, end_dt, color_id)
             event = self.service.events().insert(calendarId=calendar_id, body=event).execute()
             return event
         except Exception as e:
@@ -147,27 +189,24 @@ class GoogleCalendarAPI:
             if not self.authenticate():
                 return 0, ["Failed to authenticate with Google Calendar"]
 
-        # Regular expression to match schedule lines
-        time_pattern = r'(\d{1,2}:\d{2} [AP]M) - (\d{1,2}:\d{2} [AP]M): (.*?)(\((.*?)\))?$'
-
-        events_created = 0
         errors = []
+        events = []  # (summary, body) for every parsed line
 
         # Use today's date
         today = datetime.datetime.now().date()
 
-        for line in schedule_text.split('\n'):
+        for line in schedule_text.splitlines():
             line = line.strip()
-            if not line or line.startswith('#') or line.startswith('```'):
+            if not line or line.startswith(('#', '```')):
                 continue
 
             # Handle markdown list items format from LLM output
             if line.startswith('- '):
                 line = line[2:].strip()
 
-            match = re.search(time_pattern, line)
-            if match:
-                start_time_str, end_time_str, activity, _, goal_name = match.groups()
+            parsed = parse_schedule_line(line)
+            if parsed:
+                start_time_str, end_time_str, activity, goal_name = parsed
 
                 # Create summary from activity and goal
                 if goal_name:
@@ -183,36 +222,67 @@ class GoogleCalendarAPI:
                 # Determine color based on activity type
                 color_id = None
                 activity_lower = activity.lower()
-                if 'break' in activity_lower or 'lunch' in activity_lower:
+                if any(word in activity_lower for word in BREAK_WORDS):
                     color_id = '7'  # Default calendar green
                 elif goal_name:
                     # Use different colors for different goals
-                    # This is a simple hash function to assign consistent colors
-                    goal_hash = sum(ord(c) for c in goal_name) % 11 + 1
-                    color_id = str(goal_hash)
+                    color_id = goal_color_id(goal_name)
 
                 try:
-                    event = self.create_event(
-                        calendar_id=calendar_id,
-                        summary=summary,
-                        start_time=start_time_str,
-                        end_time=end_time_str,
-                        description=description,
-                        color_id=color_id
+                    body = self._build_event_body(
+                        summary,
+                        description,
+                        parse_time_string(start_time_str, today),
+                        parse_time_string(end_time_str, today),
+                        color_id
                     )
-
-                    if event:
-                        events_created += 1
-                    else:
-                        errors.append(f"Failed to create event: {summary}")
+                    events.append((summary, body))
                 except Exception as e:
                     errors.append(f"Error creating event {summary}: {str(e)}")
 
+        events_created = 0
+
+        def on_event_created(request_id, response, exception):
+            nonlocal events_created
+            if exception is not None:
+                errors.append(f"Error creating event {events[int(request_id)][0]}: {exception}")
+            else:
+                events_created += 1
+
+        # Insert the events in as few HTTP requests as possible
+        for chunk_start in range(0, len(events), BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_event_created)
+            chunk = range(chunk_start, min(chunk_start + BATCH_SIZE, len(events)))
+            for i in chunk:
+                batch.add(self.service.events().insert(calendarId=calendar_id, body=events[i][1]),
+                          request_id=str(i))
+            try:
+                batch.execute()
+            except Exception as e:
+                errors.extend(f"Error creating event {events[i][0]}: {str(e)}" for i in chunk)
+
         return events_created, errors
 
 
+def _save_calendar_cache(calendars: List[Dict]) -> None:
+    """Write the calendar list cache atomically, ignoring failures"""
+    try:
+        write_file_atomic(CALENDAR_CACHE_FILE, json.dumps({'fetched': time.time(), 'items': calendars}).encode())
+    except OSError:
+        pass
+
+
+def clear_calendar_cache() -> None:
+    """Forget the cached calendar list so the next lookup asks Google"""
+    try:
+        os.remove(CALENDAR_CACHE_FILE)
+    except FileNotFoundError:
+        pass
+
+
 def setup_google_calendar() -> bool:
     """Guide the user through setting up Google Calendar API"""
+    global _authenticated_api
 
     console.print("\n[bold cyan]Google Calendar Setup[/bold cyan]")
     console.print("""
@@ -232,10 +302,13 @@ To use Google Calendar integration, you need to create OAuth credentials:
 
     if os.path.exists(CLIENT_SECRETS_FILE):
         console.print("[green]✓ Credentials file found![/green]")
+        clear_calendar_cache()
 
         # Test authentication
         api = GoogleCalendarAPI()
         if api.authenticate():
+            # Re-running setup replaces any client authenticated earlier in the session
+            _authenticated_api = api
             console.print("[bold green]✓ Successfully authenticated with Google Calendar![/bold green]")
             return True
         else:
@@ -247,20 +320,51 @@ To use Google Calendar integration, you need to create OAuth credentials:
         return False
 
 
-def parse_time_string(time_str: str) -> datetime.datetime:
-    """Parse time string like '9:00 AM' to a datetime object"""
-    today = datetime.datetime.now().date()
+# Client authenticated earlier in this process, reused by get_authenticated_api()
+_authenticated_api: Optional[GoogleCalendarAPI] = None
 
-    # Try different formats
-    formats = [
-        "%I:%M %p",  # "9:00 AM"
-        "%I:%M%p",   # "9:00AM"
-        "%I %p",     # "9 AM"
-    ]
+def get_authenticated_api() -> Optional[GoogleCalendarAPI]:
+    """Authenticated client shared for the rest of the session, or None if authentication fails"""
+    global _authenticated_api
+    if _authenticated_api is None:
+        api = GoogleCalendarAPI()
+        if api.authenticate():
+            _authenticated_api = api
+    return _authenticated_api
+
+
+@functools.lru_cache(maxsize=256)
+def goal_color_id(goal_name: str) -> str:
+    """Pick a consistent calendar color (1-11) for a goal name"""
+    # This is a simple hash function to assign consistent colors
+    return str(sum(map(ord, goal_name)) % 11 + 1)
+
+
+def parse_time_string(time_str: str, day: Optional[datetime.date] = None) -> datetime.datetime:
+    """Parse time string like '9:00 AM' to a datetime object on the given day (default today)"""
+    return _parse_time_on_day(time_str.strip(), day or datetime.datetime.now().date())
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_time_on_day(time_str: str, today: datetime.date) -> datetime.datetime:
+    """Cached worker for parse_time_string; schedules reuse the same boundary times"""
+    # Fast path for "9:00 AM", "9:00AM" and "9 AM" without going through strptime
+    upper = time_str.upper()
+    meridiem = upper[-2:]
+    if meridiem in ('AM', 'PM'):
+        hour_str, _, minute_str = upper[:-2].strip().partition(':')
+        try:
+            hour = int(hour_str)
+            minute = int(minute_str) if minute_str else 0
+            if 1 <= hour <= 12:
+                hour = hour % 12 + (12 if meridiem == 'PM' else 0)
+                return datetime.datetime.combine(today, datetime.time(hour, minute))
+        except ValueError:
+            pass
 
-    for fmt in formats:
+    for fmt in TIME_FORMATS:
         try:
-            time_part = datetime.datetime.strptime(time_str.strip(), fmt)
+            time_part = datetime.datetime.strptime(time_str, fmt)
             return datetime.datetime.combine(today, time_part.time())
         except ValueError:
             continue
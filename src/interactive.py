@@ -4,20 +4,138 @@ Implements the interactive menu system
 """
 
 import os
-import json
-from datetime import datetime
+import re
+import time
+import functools
+import requests
+from itertools import islice
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
 from prompt_toolkit import prompt
-from prompt_toolkit.completion import WordCompleter
+from prompt_toolkit.completion import WordCompleter, merge_completers
+from rich.console import Group
+from rich.markup import escape
 from rich.panel import Panel
+from rich.text import Text
 from rich.table import Table
 from rich import box
 
 from beeminder_api import BeeminderAPI
-from scheduler import BeeminderScheduler
+from scheduler import BeeminderScheduler, ScheduledGoal
 from schedule_utils import get_last_schedule, LAST_SCHEDULE_FILE
-from ui import console
-from llm_interactive import start_llm_interactive_mode
-from google_calendar import GoogleCalendarAPI, setup_google_calendar
+from ui import console, print_table, print_cached, NumericRangeCompleter, YES_NO_COMPLETER
+
+# Static parts of the main menu, parsed from markup once
+MAIN_MENU = Text.from_markup(
+    "\n[bold]What would you like to do?[/bold]\n"
+    "1. [green]View all Beeminder goals[/green]\n"
+    "2. [blue]Add goal to scheduling[/blue]\n"
+    "3. [red]Remove goal from scheduling[/red]\n"
+    "4. [yellow]Edit goal settings[/yellow]\n"
+    "5. [magenta]Show scheduling requirements[/magenta]\n"
+    "6. [cyan]LLM Schedule Generator[/cyan]\n"
+    "7. [green]Google Calendar Integration[/green]\n"
+    "0. [white]Exit[/white]"
+)
+
+def _gcal_menu(has_schedule: bool) -> Text:
+    return Text.from_markup(
+        "[bold cyan]Google Calendar Integration[/bold cyan]\n"
+        "\n[bold]What would you like to do?[/bold]\n"
+        "1. [blue]Setup Google Calendar integration[/blue]\n"
+        "2. [green]List available calendars[/green]\n"
+        + ("3. [cyan]Push current schedule to Google Calendar[/cyan]\n" if has_schedule else "")
+        + "0. [white]Return to main menu[/white]"
+    )
+
+# Google Calendar menu, with and without the push option
+GCAL_MENU = {has_schedule: _gcal_menu(has_schedule) for has_schedule in (False, True)}
+
+INVALID_CHOICE = Text.from_markup("[bold red]Invalid choice![/bold red]")
+INVALID_SELECTION = Text.from_markup("[bold red]Invalid selection![/bold red]")
+
+# A number or a fraction of two numbers, e.g. "0.5" or "1/20"
+HOURS_PATTERN = re.compile(r'^\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*(?:/\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*)?$')
+
+def parse_hours(text: str) -> Optional[float]:
+    """Parse an hours-per-unit value; None if it isn't a number or a valid fraction"""
+    # Plain values like "2" or "0.5" are by far the most common; skip the regex for them
+    text = text.strip()
+    if text.replace('.', '', 1).isdecimal():
+        return float(text)
+
+    match = HOURS_PATTERN.match(text)
+    if not match:
+        return None
+    numerator, denominator = match.groups()
+    if denominator is None:
+        return float(numerator)
+    denominator = float(denominator)
+    if denominator == 0:
+        return None
+    return float(numerator) / denominator
+
+# The numeric columns of a requirements row, formatted in one call and split on tabs
+REQUIREMENT_CELLS = "{delta:.1f}\t{hours_needed:.1f}\t{hours_per_day:.1f}\t{safebuf} days\t{deadline:%Y-%m-%d}"
+
+# Goal lists longer than this are printed as plain aligned columns instead of a Table
+PLAIN_TABLE_THRESHOLD = 50
+GOAL_COLUMNS = ("#", "Goal ID", "Title", "Progress", "Deadline")
+
+# Progress cell format, keyed on (curval is known, goalval is known)
+PROGRESS_FORMATS = {
+    (True, True): "{curval:.1f}/{goalval:.1f} {gunits}",
+    (True, False): "{curval:.1f} {gunits}",
+    (False, True): "?/{goalval:.1f} {gunits}",
+    (False, False): "? {gunits}",
+}
+
+# How long the goal list is reused between menu screens, in seconds
+GOALS_TTL = 30
+
+# Goal list shared by the menu screens, with the client and TTL bucket it was fetched for
+_goals_cache: Optional[tuple] = None
+
+def get_goals(api: BeeminderAPI) -> List[Dict]:
+    """Goal list shared by the menu screens, refetched at most every GOALS_TTL seconds"""
+    global _goals_cache
+    goals = cached_goals(api)
+    if goals is None:
+        goals = api.get_goals()
+        _goals_cache = (api, int(time.monotonic() // GOALS_TTL), goals)
+    return goals
+
+def cached_goals(api: BeeminderAPI) -> Optional[List[Dict]]:
+    """The shared goal list if it is still fresh, or None; never fetches"""
+    if _goals_cache and _goals_cache[0] is api and _goals_cache[1] == int(time.monotonic() // GOALS_TTL):
+        return _goals_cache[2]
+    return None
+
+def prompt_index(message: str, count: int) -> Optional[int]:
+    """Ask for an item number 1..count; returns its 0-based index, or None to go back"""
+    return _parse_index(prompt(message, completer=NumericRangeCompleter(count)), count)
+
+def _parse_index(choice: str, count: int) -> Optional[int]:
+    """Turn a typed item number into its 0-based index, or None to go back"""
+    if choice == "0" or not choice.isdigit():
+        return None
+
+    index = int(choice) - 1
+    if index < 0 or index >= count:
+        console.print(INVALID_SELECTION)
+        prompt("\nPress Enter to continue... ")
+        return None
+    return index
+
+@functools.lru_cache(maxsize=4)
+def _header_panel(config_file: str) -> Panel:
+    """Main menu header with config info"""
+    header_text = (
+        "[bold cyan]Beeminder Scheduler[/bold cyan]\n"
+        "[dim]Integrate your Beeminder goals with your calendar[/dim]\n\n"
+        f"[dim]Config: [bold]{config_file}[/bold] "
+    )
+    return Panel(header_text, border_style="blue")
 
 def start_interactive_mode(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None:
     try:
@@ -32,54 +150,51 @@ def start_interactive_mode(api: BeeminderAPI, scheduler: BeeminderScheduler) ->
     except Exception as e:
         console.print(f"[bold red]❌ Error: {e}[/bold red]")
 
+def _draw_main_menu(scheduler: BeeminderScheduler) -> None:
+    console.clear()
+
+    # Render the whole screen in a single write, reusing the last one while the goals are unchanged
+    scheduled_goals = scheduler.get_scheduled_goals()
+    print_cached("main_menu", (scheduled_goals, scheduler.config_file),
+                 lambda: _main_menu_screen(scheduler, scheduled_goals))
+
+def _main_menu_screen(scheduler: BeeminderScheduler, scheduled_goals: Dict) -> Group:
+    header = _header_panel(scheduler.config_file)
+
+    # Show scheduled goals summary
+    if scheduled_goals:
+        table = Table(box=box.SIMPLE, show_header=True, header_style="bold")
+        table.add_column("Goal", style="dim")
+        table.add_column("Calendar Name", style="cyan")
+        table.add_column("Hours Per Unit", justify="right")
+
+        for slug, goal in scheduled_goals.items():
+            table.add_row(
+                slug,
+                Text(goal.calendar_name),
+                f"{goal.hours_per_unit}"
+            )
+
+        goals_panel = Panel(table, title="Scheduled Goals", border_style="blue")
+    else:
+        goals_panel = Panel(
+            "[italic]No goals configured for scheduling yet.[/italic]",
+            title="Scheduled Goals",
+            border_style="yellow"
+        )
+
+    return Group(header, goals_panel, MAIN_MENU)
+
 def show_interactive_menu(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None:
+    redraw = True
     while True:
-        console.clear()
+        # Only repaint after a submenu has taken over the screen
+        if redraw:
+            _draw_main_menu(scheduler)
+        redraw = True
 
-        # Create header with config info
-        header_text = (
-            "[bold cyan]Beeminder Scheduler[/bold cyan]\n"
-            "[dim]Integrate your Beeminder goals with your calendar[/dim]\n\n"
-            f"[dim]Config: [bold]{scheduler.config_file}[/bold] "
-        )
-        console.print(Panel(header_text, border_style="blue"))
-
-        # Show scheduled goals summary
-        scheduled_goals = scheduler.get_scheduled_goals()
-        if scheduled_goals:
-            table = Table(box=box.SIMPLE, show_header=True, header_style="bold")
-            table.add_column("Goal", style="dim")
-            table.add_column("Calendar Name", style="cyan")
-            table.add_column("Hours Per Unit", justify="right")
-
-            for slug, goal in scheduled_goals.items():
-                table.add_row(
-                    slug,
-                    goal.calendar_name,
-                    str(goal.hours_per_unit)
-                )
-
-            console.print(Panel(table, title="Scheduled Goals", border_style="blue"))
-        else:
-            console.print(Panel(
-                "[italic]No goals configured for scheduling yet.[/italic]",
-                title="Scheduled Goals",
-                border_style="yellow"
-            ))
-
-        # Show menu options
-        console.print("\n[bold]What would you like to do?[/bold]")
-        console.print("1. [green]View all Beeminder goals[/green]")
-        console.print("2. [blue]Add goal to scheduling[/blue]")
-        console.print("3. [red]Remove goal from scheduling[/red]")
-        console.print("4. [yellow]Edit goal settings[/yellow]")
-        console.print("5. [magenta]Show scheduling requirements[/magenta]")
-        console.print("6. [cyan]LLM Schedule Generator[/cyan]")
-        console.print("7. [green]Google Calendar Integration[/green]")
-        console.print("0. [white]Exit[/white]")
-
-        choice = prompt("\nEnter your choice (0-7): ",
-                      completer=WordCompleter(['0', '1', '2', '3', '4', '5', '6', '7']))
+        # Single-digit menus get no completer; the if/elif chain below validates the choice
+        choice = prompt("\nEnter your choice (0-7): ")
 
         if choice == "0":
             break
@@ -94,36 +209,36 @@ def show_interactive_menu(api: BeeminderAPI, scheduler: BeeminderScheduler) -> N
         elif choice == "5":
             show_scheduling_requirements(scheduler)
         elif choice == "6":
+            # Pulls in the OpenAI client, so only loaded when the LLM menu is opened
+            from llm_interactive import start_llm_interactive_mode
             start_llm_interactive_mode(api, scheduler)
         elif choice == "7":
             show_google_calendar_menu(api, scheduler)
         else:
-            console.print("[bold red]Invalid choice![/bold red]")
-            prompt("\nPress Enter to continue... ")
+            console.print(INVALID_CHOICE)
+            redraw = False
 
 def show_google_calendar_menu(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None:
     """Show the Google Calendar integration menu"""
+    redraw = True
     while True:
-        console.clear()
-        console.print("[bold cyan]Google Calendar Integration[/bold cyan]")
+        # Only repaint after a submenu has taken over the screen
+        if redraw:
+            console.clear()
 
-        # Check if we have a last generated schedule
-        has_schedule = os.path.exists(LAST_SCHEDULE_FILE)
+            # Check if we have a last generated schedule
+            has_schedule = os.path.exists(LAST_SCHEDULE_FILE)
 
-        console.print("\n[bold]What would you like to do?[/bold]")
-        console.print("1. [blue]Setup Google Calendar integration[/blue]")
-        console.print("2. [green]List available calendars[/green]")
-        if has_schedule:
-            console.print("3. [cyan]Push current schedule to Google Calendar[/cyan]")
-        console.print("0. [white]Return to main menu[/white]")
+            console.print(GCAL_MENU[has_schedule])
+        redraw = True
 
         max_choice = "3" if has_schedule else "2"
-        choice = prompt(f"\nEnter your choice (0-{max_choice}): ",
-                      completer=WordCompleter(['0', '1', '2'] + (['3'] if has_schedule else [])))
+        choice = prompt(f"\nEnter your choice (0-{max_choice}): ")
 
         if choice == "0":
             break
         elif choice == "1":
+            from google_calendar import setup_google_calendar
             setup_google_calendar()
             prompt("\nPress Enter to continue... ")
         elif choice == "2":
@@ -131,26 +246,50 @@ def show_google_calendar_menu(api: BeeminderAPI, scheduler: BeeminderScheduler)
         elif choice == "3" and has_schedule:
             push_schedule_to_calendar(scheduler)
         else:
-            console.print("[bold red]Invalid choice![/bold red]")
-            prompt("\nPress Enter to continue... ")
-
-def list_google_calendars(scheduler: BeeminderScheduler) -> None:
-    """List available Google Calendars and set default"""
-    console.clear()
-    console.print("[bold cyan]Google Calendars[/bold cyan]")
-
-    api = GoogleCalendarAPI()
-    if not api.authenticate():
+            console.print(INVALID_CHOICE)
+            redraw = False
+
+def list_google_calendars(scheduler: BeeminderScheduler) -> Optional[str]:
+    """List available Google Calendars and set default; returns the chosen calendar ID"""
+    from google_calendar import get_authenticated_api
+    api = get_authenticated_api()
+    if api is None:
+        console.clear()
+        console.print("[bold cyan]Google Calendars[/bold cyan]")
         console.print("[bold red]❌ Failed to authenticate with Google Calendar[/bold red]")
         prompt("\nPress Enter to continue... ")
-        return
+        return None
 
-    calendars = api.get_calendar_list()
+    refresh = False
+    while True:
+        calendars = api.get_calendar_list(refresh=refresh)
+        calendar_index = _pick_calendar(scheduler, calendars)
+        if calendar_index != "r":
+            break
+        refresh = True
+
+    if calendar_index is None:
+        return None
+
+    selected_calendar = calendars[calendar_index]
+    selected_id = selected_calendar.get('id', '')
+    selected_name = selected_calendar.get('summary', '')
+
+    scheduler.set_default_calendar(selected_id)
+
+    console.print(f"[bold green]✓ Set [bold]{escape(selected_name)}[/bold] as default calendar![/bold green]")
+    prompt("\nPress Enter to continue... ")
+    return selected_id
+
+def _pick_calendar(scheduler: BeeminderScheduler, calendars: List[Dict]) -> Union[int, str, None]:
+    """Show the calendars and ask for a new default; returns its index, "r" to refresh, or None to go back"""
+    console.clear()
+    console.print("[bold cyan]Google Calendars[/bold cyan]")
 
     if not calendars:
         console.print("[yellow]No calendars found[/yellow]")
-        prompt("\nPress Enter to continue... ")
-        return
+        choice = prompt("\nEnter 'r' to reload from Google, or press Enter to continue... ")
+        return "r" if choice.strip().lower() == "r" else None
 
     table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
     table.add_column("#", style="dim", width=4)
@@ -158,15 +297,8 @@ def list_google_calendars(scheduler: BeeminderScheduler) -> None:
     table.add_column("Name", style="bold")
     table.add_column("Default", justify="center")
 
-    # Load config to check for default calendar
-    config_file = os.path.expanduser("~/.beeminder-schedule.json")
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-    else:
-        config = {}
-
-    default_calendar_id = config.get('google_calendar_id', '')
+    # The scheduler already holds the parsed config
+    default_calendar_id = scheduler.get_default_calendar()
 
     for i, calendar in enumerate(calendars, 1):
         calendar_id = calendar.get('id', '')
@@ -175,36 +307,18 @@ def list_google_calendars(scheduler: BeeminderScheduler) -> None:
         table.add_row(
             str(i),
             calendar_id,
-            calendar.get('summary', ''),
+            Text(calendar.get('summary', '')),
             "[bold green]✓[/bold green]" if is_default else ""
         )
 
-    console.print(table)
-
     # Prompt to set default
-    console.print("\n[dim]You can set a default calendar to use for all schedule pushes.[/dim]")
-    calendar_choice = prompt("Select calendar # to set as default (or 0 to return): ",
-                           completer=WordCompleter([str(i) for i in range(len(calendars) + 1)]))
-
-    if calendar_choice == "0" or not calendar_choice.isdigit():
-        return
-
-    calendar_index = int(calendar_choice) - 1
-    if calendar_index < 0 or calendar_index >= len(calendars):
-        console.print("[bold red]Invalid selection![/bold red]")
-        prompt("\nPress Enter to continue... ")
-        return
-
-    selected_calendar = calendars[calendar_index]
-    selected_id = selected_calendar.get('id', '')
-    selected_name = selected_calendar.get('summary', '')
-
-    config['google_calendar_id'] = selected_id
-    with open(config_file, 'w') as f:
-        json.dump(config, f, indent=2)
-
-    console.print(f"[bold green]✓ Set [bold]{selected_name}[/bold] as default calendar![/bold green]")
-    prompt("\nPress Enter to continue... ")
+    print_table(table, "\n[dim]You can set a default calendar to use for all schedule pushes.[/dim]",
+                "[dim]Enter 'r' to reload the list from Google.[/dim]")
+    choice = prompt("Select calendar # to set as default (or 0 to return): ",
+                    completer=NumericRangeCompleter(len(calendars))).strip()
+    if choice.lower() == "r":
+        return "r"
+    return _parse_index(choice, len(calendars))
 
 def push_schedule_to_calendar(scheduler: BeeminderScheduler) -> None:
     """Push the last generated schedule to Google Calendar"""
@@ -220,24 +334,20 @@ def push_schedule_to_calendar(scheduler: BeeminderScheduler) -> None:
         return
 
     # Check if a default calendar is set
-    config_file = os.path.expanduser("~/.beeminder-schedule.json")
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-    else:
-        config = {}
-
-    default_calendar_id = config.get('google_calendar_id', '')
+    default_calendar_id = scheduler.get_default_calendar()
 
     if not default_calendar_id:
         console.print("[yellow]No default calendar is set[/yellow]")
         console.print("[dim]Please select a default calendar first[/dim]")
-        list_google_calendars(scheduler)
-        return
+        # Carry on with the push once one is picked, reusing the same authenticated client
+        default_calendar_id = list_google_calendars(scheduler)
+        if not default_calendar_id:
+            return
 
     # Authenticate with Google Calendar
-    api = GoogleCalendarAPI()
-    if not api.authenticate():
+    from google_calendar import get_authenticated_api
+    api = get_authenticated_api()
+    if api is None:
         console.print("[bold red]❌ Failed to authenticate with Google Calendar[/bold red]")
         prompt("\nPress Enter to continue... ")
         return
@@ -245,7 +355,7 @@ def push_schedule_to_calendar(scheduler: BeeminderScheduler) -> None:
     # Confirm with user
     console.print("[dim]Ready to push the current schedule to Google Calendar.[/dim]")
     confirm = prompt("Do you want to continue? (yes/no): ",
-                   completer=WordCompleter(['yes', 'no']))
+                   completer=YES_NO_COMPLETER)
 
     if confirm.lower() != 'yes':
         console.print("[yellow]Operation cancelled.[/yellow]")
@@ -278,6 +388,10 @@ def show_scheduling_requirements(scheduler: BeeminderScheduler) -> None:
         prompt("\nPress Enter to continue... ")
         return
 
+    print_cached("requirements", (requirements,), lambda: _requirements_screen(requirements))
+    prompt("\nPress Enter to continue... ")
+
+def _requirements_screen(requirements: Dict) -> Group:
     table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
     table.add_column("Activity", style="bold")
     table.add_column("Units Needed", justify="right")
@@ -287,93 +401,108 @@ def show_scheduling_requirements(scheduler: BeeminderScheduler) -> None:
     table.add_column("Deadline", justify="center")
     table.add_column("Beeminder Says", justify="left")
 
-    total_hours = 0
-    for slug, data in requirements.items():
-        deadline_str = data['deadline'].strftime("%Y-%m-%d")
-        row_style = data['urgency']
-        buffer_days = data['safebuf']
-        buffer_text = f"{buffer_days} days"
-        hours = data['hours_needed']
-        total_hours += hours
-
-        table.add_row(
-            data['calendar_name'],
-            f"{data['delta']:.1f}",
-            f"{hours:.1f}",
-            f"{data['hours_per_day']:.1f}",
-            buffer_text,
-            deadline_str,
-            data.get('limsum', ''),
-            style=row_style
+    # Bound once so the loop below doesn't repeat the attribute lookups
+    add_row, format_cells = table.add_row, REQUIREMENT_CELLS.format_map
+    for data in requirements.values():
+        add_row(
+            Text(data['calendar_name']),
+            *format_cells(data).split('\t'),
+            Text(data.get('limsum', '')),
+            style=data['urgency']
         )
-
-    console.print(table)
-    console.print(f"\n[bold]Total hours needed today:[/bold] [cyan]{total_hours:.1f}[/cyan]")
-    prompt("\nPress Enter to continue... ")
+    total_hours = sum(data['hours_needed'] for data in requirements.values())
+
+    return Group(table, Text.from_markup(f"\n[bold]Total hours needed today:[/bold] [cyan]{total_hours:.1f}[/cyan]"))
+
+def _render_goals_plain(rows: List[tuple]) -> Text:
+    """Goal rows as pre-aligned columns, for lists too long to lay out as a Table"""
+    widths = [max(map(len, column)) for column in zip(GOAL_COLUMNS, *(row[:5] for row in rows))]
+    text = Text(no_wrap=True, overflow="ellipsis")
+    text.append("  ".join(f"{header:<{width}}" for header, width in zip(GOAL_COLUMNS, widths)) + "  Scheduled\n",
+                style="bold cyan")
+    append = text.append
+    for number, slug, title, progress, deadline, deadline_style, mark in rows:
+        append(f"{number:>{widths[0]}}  {slug:<{widths[1]}}  ", style="dim")
+        append(f"{title:<{widths[2]}}  {progress:>{widths[3]}}  ")
+        append(f"{deadline:^{widths[4]}}", style=deadline_style)
+        append(f"  {mark}\n", style="bold green")
+    text.rstrip()
+    return text
 
 def view_all_goals(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None:
     console.clear()
     console.print("[bold cyan]All Beeminder Goals[/bold cyan]")
 
-    all_goals = api.get_goals()
+    all_goals = get_goals(api)
+    # Keyed by slug, so the dict itself answers "is this goal scheduled?"
     scheduled_goals = scheduler.get_scheduled_goals()
-    scheduled_slugs = {goal.slug for goal in scheduled_goals.values()}
 
-    table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
-    table.add_column("#", style="dim", width=4)
-    table.add_column("Goal ID", style="dim", width=12)
-    table.add_column("Title", min_width=20)
-    table.add_column("Progress", justify="right")
-    table.add_column("Deadline", justify="center")
-    table.add_column("Scheduled", justify="center", width=10)
+    # Deadline colours depend on the time, so the output is only reused within the same minute
+    now_ts = datetime.now().timestamp()
+    print_cached("all_goals", (all_goals, scheduled_goals, int(now_ts // 60)),
+                 lambda: _goals_screen(all_goals, scheduled_goals, now_ts))
+    prompt("\nPress Enter to continue... ")
 
+def _goals_screen(all_goals: List[Dict], scheduled_goals: Dict, now_ts: float):
+    # Less than one / three whole days left, as plain timestamps to compare against
+    red_cutoff = now_ts + 86400
+    yellow_cutoff = now_ts + 3 * 86400
+
+    rows = []
     for i, goal in enumerate(all_goals, 1):
         slug = goal.get('slug')
-        deadline = datetime.fromtimestamp(goal.get('losedate', 0))
-        days_left = (deadline - datetime.now()).days
-
-        if days_left < 1:
-            deadline_str = f"[bold red]{deadline.strftime('%Y-%m-%d')}[/bold red]"
-        elif days_left < 3:
-            deadline_str = f"[yellow]{deadline.strftime('%Y-%m-%d')}[/yellow]"
-        else:
-            deadline_str = deadline.strftime("%Y-%m-%d")
-
-        scheduled_str = "[bold green]✓[/bold green]" if slug in scheduled_slugs else ""
-
+        losedate = goal.get('losedate', 0)
         curval = goal.get('curval')
         goalval = goal.get('goalval')
         gunits = goal.get('gunits', '')
+        title = goal.get('title', '')
+        deadline_date = date.fromtimestamp(losedate).isoformat()
 
-        if curval is not None and goalval is not None:
-            progress = f"{curval:.1f}/{goalval:.1f} {gunits}"
-        elif curval is not None:
-            progress = f"{curval:.1f} {gunits}"
-        elif goalval is not None:
-            progress = f"?/{goalval:.1f} {gunits}"
+        if losedate < red_cutoff:
+            deadline_style = "bold red"
+        elif losedate < yellow_cutoff:
+            deadline_style = "yellow"
         else:
-            progress = f"? {gunits}"
+            deadline_style = ""
 
-        table.add_row(
-            str(i),
+        progress = PROGRESS_FORMATS[curval is not None, goalval is not None].format(
+            curval=curval, goalval=goalval, gunits=gunits)
+
+        rows.append((str(i), slug or "", title, progress, deadline_date, deadline_style,
+                     "✓" if slug in scheduled_goals else ""))
+
+    if len(rows) > PLAIN_TABLE_THRESHOLD:
+        # Measuring a Table this size is slower than aligning the columns ourselves
+        return _render_goals_plain(rows)
+
+    table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
+    table.add_column("#", style="dim", width=4)
+    table.add_column("Goal ID", style="dim", width=12)
+    table.add_column("Title", min_width=20)
+    table.add_column("Progress", justify="right")
+    table.add_column("Deadline", justify="center")
+    table.add_column("Scheduled", justify="center", width=10)
+
+    add_row = table.add_row
+    for number, slug, title, progress, deadline, deadline_style, mark in rows:
+        add_row(
+            number,
             slug,
-            goal.get('title', ''),
-            progress,
-            deadline_str,
-            scheduled_str
+            Text(title),
+            Text(progress),
+            Text(deadline, style=deadline_style),
+            Text(mark, style="bold green")
         )
-
-    console.print(table)
-    prompt("\nPress Enter to continue... ")
+    return table
 
 def add_goal_to_scheduling(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None:
     console.clear()
     console.print("[bold cyan]Add Goal to Scheduling[/bold cyan]")
 
-    all_goals = api.get_goals()
+    all_goals = get_goals(api)
     scheduled_goals = scheduler.get_scheduled_goals()
-    scheduled_slugs = set(scheduled_goals.keys())
-    available_goals = [g for g in all_goals if g['slug'] not in scheduled_slugs]
+    available_goals = [g for g in all_goals if g['slug'] not in scheduled_goals]
+    available_by_slug = {g['slug']: g for g in available_goals}
 
     if not available_goals:
         console.print("[bold yellow]All goals are already scheduled![/bold yellow]")
@@ -390,29 +519,32 @@ def add_goal_to_scheduling(api: BeeminderAPI, scheduler: BeeminderScheduler) ->
         table.add_row(
             str(i),
             goal.get('slug'),
-            goal.get('title', ''),
-            goal.get('gunits', '')
+            Text(goal.get('title', '')),
+            Text(goal.get('gunits', ''))
         )
 
-    console.print(table)
-    goal_numbers = [str(i) for i in range(len(available_goals) + 1)]  # Include 0 for return
-    goal_choice = prompt("\nSelect goal # to add (or 0 to return to main menu): ",
-                       completer=WordCompleter(goal_numbers))
-
-    if goal_choice == "0" or not goal_choice.isdigit():
+    print_table(table)
+    # Accept either the row number or the goal's slug
+    completer = merge_completers([NumericRangeCompleter(len(available_goals)),
+                                  WordCompleter(list(available_by_slug))])
+    choice = prompt("\nSelect goal # or slug to add (or 0 to return to main menu): ",
+                    completer=completer).strip()
+    if not choice or choice == "0":
         return
 
-    goal_index = int(goal_choice) - 1
-    if goal_index < 0 or goal_index >= len(available_goals):
-        console.print("[bold red]Invalid selection![/bold red]")
+    # Row numbers win over numeric slugs, so every listed row stays reachable
+    if choice.isdigit() and 0 < int(choice) <= len(available_goals):
+        selected_goal = available_goals[int(choice) - 1]
+    elif choice in available_by_slug:
+        selected_goal = available_by_slug[choice]
+    else:
+        console.print(INVALID_SELECTION)
         prompt("\nPress Enter to continue... ")
         return
-
-    selected_goal = available_goals[goal_index]
     slug = selected_goal['slug']
     title = selected_goal['title']
 
-    console.print(f"\n[bold]Selected:[/bold] {slug} - {title}")
+    console.print(f"\n[bold]Selected:[/bold] {slug} - {escape(title)}")
     console.print("\n[dim]The calendar name is what will appear in your calendar events.[/dim]")
 
     calendar_name = prompt(f"Calendar event name [{title}]: ",
@@ -430,71 +562,61 @@ def add_goal_to_scheduling(api: BeeminderAPI, scheduler: BeeminderScheduler) ->
             hours_per_unit = 1.0
             break
 
-        try:
-            if '/' in hours_input:
-                numerator, denominator = hours_input.split('/', 1)
-                try:
-                    hours_per_unit = float(numerator.strip()) / float(denominator.strip())
-                except (ValueError, ZeroDivisionError):
-                    console.print("[bold red]Invalid fraction format. Use format like '1/20'[/bold red]")
-                    continue
-            else:
-                hours_per_unit = float(hours_input)
-
-            if hours_per_unit <= 0:
-                console.print("[bold red]Hours must be greater than zero[/bold red]")
-                continue
-            break
-        except ValueError:
-            console.print("[bold red]Please enter a valid number or fraction[/bold red]")
+        hours_per_unit = parse_hours(hours_input)
+        if hours_per_unit is None:
+            console.print("[bold red]Please enter a valid number or fraction like '1/20'[/bold red]")
+            continue
+        if hours_per_unit <= 0:
+            console.print("[bold red]Hours must be greater than zero[/bold red]")
+            continue
+        break
 
     scheduler.add_goal(slug, calendar_name, hours_per_unit)
-    console.print(f"\n[bold green]✓ Added '{slug}' to scheduling as '{calendar_name}'[/bold green]")
+    console.print(f"\n[bold green]✓ Added '{slug}' to scheduling as '{escape(calendar_name)}'[/bold green]")
     console.print(f"[dim]Time conversion: {hours_per_unit} hours per {units}[/dim]")
     prompt("\nPress Enter to continue... ")
 
-def remove_goal_from_scheduling(scheduler: BeeminderScheduler) -> None:
-    console.clear()
-    console.print("[bold cyan]Remove Goal from Scheduling[/bold cyan]")
-
-    scheduled_goals = scheduler.get_scheduled_goals()
-    if not scheduled_goals:
-        console.print("[bold yellow]No goals currently scheduled[/bold yellow]")
-        prompt("\nPress Enter to continue... ")
-        return
-
+def _scheduled_goals_table(scheduled_goals: Dict) -> Table:
     table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
     table.add_column("#", style="dim", width=4)
     table.add_column("Goal ID", style="dim")
     table.add_column("Calendar Name")
     table.add_column("Hours per Unit", justify="right")
 
-    scheduled_list = list(scheduled_goals.items())
-    for i, (slug, goal) in enumerate(scheduled_list, 1):
+    for i, (slug, goal) in enumerate(scheduled_goals.items(), 1):
         table.add_row(
             str(i),
             slug,
-            goal.calendar_name,
-            str(goal.hours_per_unit)
+            Text(goal.calendar_name),
+            f"{goal.hours_per_unit}"
         )
+    return table
 
-    console.print(table)
-    goal_numbers = [str(i) for i in range(len(scheduled_list) + 1)]
-    goal_choice = prompt("\nSelect goal # to remove (or 0 to return to main menu): ",
-                       completer=WordCompleter(goal_numbers))
+def _pick_scheduled_goal(scheduled_goals: Dict, action: str) -> Optional[Tuple[str, ScheduledGoal]]:
+    """Show the scheduled goals and ask which one to act on; None to go back"""
+    print_cached("scheduled_goals", (scheduled_goals,), lambda: _scheduled_goals_table(scheduled_goals))
+    goal_index = prompt_index(f"\nSelect goal # to {action} (or 0 to return to main menu): ", len(scheduled_goals))
+    if goal_index is None:
+        return None
+    return next(islice(scheduled_goals.items(), goal_index, None))
 
-    if goal_choice == "0" or not goal_choice.isdigit():
-        return
+def remove_goal_from_scheduling(scheduler: BeeminderScheduler) -> None:
+    console.clear()
+    console.print("[bold cyan]Remove Goal from Scheduling[/bold cyan]")
 
-    goal_index = int(goal_choice) - 1
-    if goal_index < 0 or goal_index >= len(scheduled_list):
-        console.print("[bold red]Invalid selection![/bold red]")
+    scheduled_goals = scheduler.get_scheduled_goals()
+    if not scheduled_goals:
+        console.print("[bold yellow]No goals currently scheduled[/bold yellow]")
         prompt("\nPress Enter to continue... ")
         return
 
-    slug = scheduled_list[goal_index][0]
+    picked = _pick_scheduled_goal(scheduled_goals, "remove")
+    if picked is None:
+        return
+
+    slug = picked[0]
     console.print(f"\n[yellow]Are you sure you want to remove '{slug}' from scheduling?[/yellow]")
-    confirm = prompt("Type 'yes' to confirm: ", completer=WordCompleter(['yes', 'no']))
+    confirm = prompt("Type 'yes' to confirm: ", completer=YES_NO_COMPLETER)
 
     if confirm.lower() != "yes":
         console.print("[yellow]Removal canceled.[/yellow]")
@@ -515,44 +637,27 @@ def edit_goal_settings(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None
         prompt("\nPress Enter to continue... ")
         return
 
-    table = Table(box=box.ROUNDED, show_header=True, header_style="bold cyan")
-    table.add_column("#", style="dim", width=4)
-    table.add_column("Goal ID", style="dim")
-    table.add_column("Calendar Name")
-    table.add_column("Hours per Unit", justify="right")
-
-    scheduled_list = list(scheduled_goals.items())
-    for i, (slug, goal) in enumerate(scheduled_list, 1):
-        table.add_row(
-            str(i),
-            slug,
-            goal.calendar_name,
-            str(goal.hours_per_unit)
-        )
-
-    console.print(table)
-    goal_numbers = [str(i) for i in range(len(scheduled_list) + 1)]
-    goal_choice = prompt("\nSelect goal # to edit (or 0 to return to main menu): ",
-                       completer=WordCompleter(goal_numbers))
-
-    if goal_choice == "0" or not goal_choice.isdigit():
-        return
-
-    goal_index = int(goal_choice) - 1
-    if goal_index < 0 or goal_index >= len(scheduled_list):
-        console.print("[bold red]Invalid selection![/bold red]")
-        prompt("\nPress Enter to continue... ")
+    picked = _pick_scheduled_goal(scheduled_goals, "edit")
+    if picked is None:
         return
 
-    slug, goal = scheduled_list[goal_index]
-    try:
-        goal_data = api.get_goal(slug)
-        units = goal_data.get('gunits', 'units')
-    except:
-        units = 'units'
+    slug, goal = picked
+    units = goal.gunits
+    if units is None:
+        # Goals added before units were stored in the config; look them up in
+        # the shared goal list if it is fresh, otherwise fetch just this goal
+        try:
+            goals = cached_goals(api)
+            if goals is not None:
+                goal_info = {g['slug']: g for g in goals}[slug]
+            else:
+                goal_info = api.get_goal(slug)
+            units = goal_info.get('gunits', 'units')
+        except (KeyError, requests.RequestException):
+            units = 'units'
 
     console.print(f"\n[bold]Editing:[/bold] {slug}")
-    console.print(f"[dim]Current calendar name:[/dim] {goal.calendar_name}")
+    console.print(f"[dim]Current calendar name:[/dim] {escape(goal.calendar_name)}")
     console.print(f"[dim]Current conversion:[/dim] {goal.hours_per_unit} hours per {units}")
 
     console.print("\n[dim]Leave blank to keep current value[/dim]")
@@ -564,22 +669,12 @@ def edit_goal_settings(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None
     hours_input = prompt(f"New hours per {units} value: ", completer=WordCompleter(hour_suggestions))
 
     if hours_input:
-        try:
-            if '/' in hours_input:
-                numerator, denominator = hours_input.split('/', 1)
-                try:
-                    hours_per_unit = float(numerator.strip()) / float(denominator.strip())
-                except (ValueError, ZeroDivisionError):
-                    console.print("[bold red]Invalid fraction format, ignoring this change[/bold red]")
-                    hours_per_unit = None
-            else:
-                hours_per_unit = float(hours_input)
-
-            if hours_per_unit is not None and hours_per_unit <= 0:
-                console.print("[bold red]Hours must be greater than zero, ignoring this change[/bold red]")
-                hours_per_unit = None
-        except ValueError:
+        hours_per_unit = parse_hours(hours_input)
+        if hours_per_unit is None:
             console.print("[bold red]Invalid number or fraction, ignoring this change[/bold red]")
+        elif hours_per_unit <= 0:
+            console.print("[bold red]Hours must be greater than zero, ignoring this change[/bold red]")
+            hours_per_unit = None
 
     if calendar_name or hours_per_unit is not None:
         scheduler.update_goal(slug,
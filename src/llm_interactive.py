@@ -5,18 +5,47 @@ Implements the LLM scheduling functionality and menu system
 
 import os
 import re
-from datetime import datetime
+from typing import Dict, Optional, Tuple
 from prompt_toolkit import prompt
 from prompt_toolkit.completion import WordCompleter
 from prompt_toolkit.history import FileHistory
+from rich.console import Group
+from rich.markup import escape
 from rich.panel import Panel
+from rich.text import Text
 
 from beeminder_api import BeeminderAPI
 from scheduler import BeeminderScheduler
 from llm_scheduler import LLMScheduler
-from ui import console, display_schedule
-from google_calendar import GoogleCalendarAPI
-from schedule_utils import save_last_schedule
+from ui import console, print_table, display_schedule, NumericRangeCompleter, YES_NO_COMPLETER
+from google_calendar import get_authenticated_api
+from schedule_utils import save_last_schedule, default_start_time
+
+START_TIME_COMPLETER = WordCompleter(['9:00', '9:00 AM', '8:30', '8:00', '7:30', '7:00'])
+END_TIME_COMPLETER = WordCompleter(['5:00 PM', '6:00 PM', '7:00 PM', '8:00 PM', '9:00 PM'])
+
+# Shared so the history file is loaded once per session, not once per line
+PREFERENCES_HISTORY = FileHistory(os.path.expanduser("~/.beeminder-preferences-history"))
+
+# 9, 14, 9am, 2 pm, 9:00, 14:30, 9:00am or 2:30 pm
+TIME_INPUT_PATTERN = re.compile(r'^\d{1,2}(?::\d{2})?\s*(?:[ap]m)?$')
+
+# The whole LLM menu screen, built once and printed in a single call
+LLM_MENU = Group(
+    Panel(
+        "[bold cyan]Beeminder LLM Scheduler[/bold cyan]\n"
+        "[dim]Generate daily schedules based on your Beeminder goals[/dim]",
+        border_style="blue"
+    ),
+    Text.from_markup(
+        "\n[bold]What would you like to do?[/bold]\n"
+        "1. [green]Generate daily schedule[/green]\n"
+        "2. [blue]Setup API key[/blue]\n"
+        "3. [yellow]Edit prompt template[/yellow]\n"
+        "4. [cyan]Generate schedule and push to Google Calendar[/cyan]\n"
+        "0. [white]Return to main menu[/white]"
+    )
+)
 
 def start_llm_interactive_mode(api: BeeminderAPI, scheduler: BeeminderScheduler) -> None:
     try:
@@ -28,24 +57,15 @@ def start_llm_interactive_mode(api: BeeminderAPI, scheduler: BeeminderScheduler)
         console.print(f"[bold red]❌ Error: {e}[/bold red]")
 
 def show_llm_menu(llm_scheduler: LLMScheduler) -> None:
+    redraw = True
     while True:
-        console.clear()
-
-        console.print(Panel(
-            "[bold cyan]Beeminder LLM Scheduler[/bold cyan]\n"
-            "[dim]Generate daily schedules based on your Beeminder goals[/dim]",
-            border_style="blue"
-        ))
-
-        console.print("\n[bold]What would you like to do?[/bold]")
-        console.print("1. [green]Generate daily schedule[/green]")
-        console.print("2. [blue]Setup API key[/blue]")
-        console.print("3. [yellow]Edit prompt template[/yellow]")
-        console.print("4. [cyan]Generate schedule and push to Google Calendar[/cyan]")
-        console.print("0. [white]Return to main menu[/white]")
+        # Only repaint after a submenu has taken over the screen
+        if redraw:
+            console.clear()
+            console.print(LLM_MENU)
+        redraw = True
 
-        choice = prompt("\nEnter your choice (0-4): ",
-                      completer=WordCompleter(['0', '1', '2', '3', '4']))
+        choice = prompt("\nEnter your choice (0-4): ")
 
         if choice == "0":
             break
@@ -61,37 +81,23 @@ def show_llm_menu(llm_scheduler: LLMScheduler) -> None:
             generate_and_push_to_calendar(llm_scheduler)
         else:
             console.print("[bold red]Invalid choice![/bold red]")
-            prompt("\nPress Enter to continue... ")
+            redraw = False
 
 def validate_time_format(time_str: str) -> bool:
     if not time_str:
         return True  # Empty string is valid for end time
 
-    patterns = [
-        r'^\d{1,2}:\d{2}$',             # 9:00 or 14:30
-        r'^\d{1,2}:\d{2}\s*[ap]m$',     # 9:00am or 2:30 pm
-        r'^\d{1,2}\s*[ap]m$',           # 9am or 2 pm
-        r'^\d{1,2}$'                    # Just the hour: 9 or 14
-    ]
-
-    time_str = time_str.lower().strip()
-    for pattern in patterns:
-        if re.match(pattern, time_str):
-            return True
-
-    return False
-
-def generate_daily_schedule(llm_scheduler: LLMScheduler) -> None:
-    console.clear()
-    console.print("[bold cyan]Generate Daily Schedule[/bold cyan]")
+    return TIME_INPUT_PATTERN.match(time_str.lower().strip()) is not None
 
+def _collect_schedule_inputs(llm_scheduler: LLMScheduler) -> Optional[Tuple[Dict, str, Optional[str], str]]:
+    """Ask for everything a schedule needs; returns (requirements, start, end, preferences) or None to go back"""
     api_key = llm_scheduler.config.get('api_key', '')
     if not api_key:
         console.print("[yellow]API key not set up yet.[/yellow]")
         api_key = llm_scheduler.setup_api_key()
         if not api_key:
             prompt("\nPress Enter to continue... ")
-            return
+            return None
 
     console.print("[dim]Fetching today's Beeminder requirements...[/dim]")
     requirements = llm_scheduler.beeminder_scheduler.calculate_requirements()
@@ -100,32 +106,23 @@ def generate_daily_schedule(llm_scheduler: LLMScheduler) -> None:
         console.print("[bold yellow]No scheduled goals found.[/bold yellow]")
         console.print("[dim]Add goals for scheduling first before generating a schedule.[/dim]")
         prompt("\nPress Enter to continue... ")
-        return
+        return None
 
     console.print(Panel(f"[bold]Found {len(requirements)} goals to schedule[/bold]", border_style="green"))
 
-    time_completer = WordCompleter(['9:00', '9:00 AM', '8:30', '8:00', '7:30', '7:00'])
-    now = datetime.now()
-    minutes = now.minute
-    rounded_minutes = ((minutes + 14) // 15) * 15
-    if rounded_minutes >= 60:
-        rounded_time = now.replace(hour=now.hour + 1, minute=0, second=0, microsecond=0)
-    else:
-        rounded_time = now.replace(minute=rounded_minutes, second=0, microsecond=0)
-    default_start_time = rounded_time.strftime("%I:%M %p").lstrip('0')
+    start_time_default = default_start_time()
 
     while True:
-        start_time = prompt(f"Start time for today's schedule (empty for {default_start_time}): ", completer=time_completer)
+        start_time = prompt(f"Start time for today's schedule (empty for {start_time_default}): ", completer=START_TIME_COMPLETER)
         if not start_time:
-            start_time = default_start_time
+            start_time = start_time_default
             break
         if validate_time_format(start_time):
             break
         console.print("[yellow]Invalid time format. Try something like '9:00 AM' or '9:00'.[/yellow]")
 
-    end_time_completer = WordCompleter(['5:00 PM', '6:00 PM', '7:00 PM', '8:00 PM', '9:00 PM'])
     while True:
-        end_time = prompt("End time (optional, press Enter to skip): ", completer=end_time_completer)
+        end_time = prompt("End time (optional, press Enter to skip): ", completer=END_TIME_COMPLETER)
         if not end_time or validate_time_format(end_time):
             break
         console.print("[yellow]Invalid time format. Try something like '5:00 PM' or '17:00'.[/yellow]")
@@ -136,30 +133,40 @@ def generate_daily_schedule(llm_scheduler: LLMScheduler) -> None:
 
     preferences = []
     while True:
-        line = prompt("> ", history=FileHistory(os.path.expanduser("~/.beeminder-preferences-history")))
+        line = prompt("> ", history=PREFERENCES_HISTORY)
         if not line and (not preferences or not preferences[-1]):
             break
         preferences.append(line)
 
-    user_preferences = "\n".join(preferences)
+    return requirements, start_time, end_time or None, "\n".join(preferences)
+
+def _generate_schedule(llm_scheduler: LLMScheduler) -> Optional[str]:
+    """Collect the inputs, then generate, save and show a schedule; None if the user backed out"""
+    inputs = _collect_schedule_inputs(llm_scheduler)
+    if inputs is None:
+        return None
 
     console.print("\n[bold]Generating your schedule...[/bold]")
-    schedule = llm_scheduler.generate_schedule(
-        requirements,
-        start_time,
-        end_time if end_time else None,
-        user_preferences
-    )
+    schedule = llm_scheduler.generate_schedule(*inputs)
 
     # Save the generated schedule for later use
     save_last_schedule(schedule)
 
     display_schedule(schedule)
+    return schedule
+
+def generate_daily_schedule(llm_scheduler: LLMScheduler) -> None:
+    console.clear()
+    console.print("[bold cyan]Generate Daily Schedule[/bold cyan]")
+
+    schedule = _generate_schedule(llm_scheduler)
+    if schedule is None:
+        return
 
     while True:
         console.print("\n[bold]Would you like to refine this schedule?[/bold]")
         refine_choice = prompt("Enter 'yes' to refine or 'no' to finish: ",
-                             completer=WordCompleter(['yes', 'no']))
+                             completer=YES_NO_COMPLETER)
         if refine_choice.lower() != 'yes':
             break
 
@@ -192,102 +199,28 @@ def generate_and_push_to_calendar(llm_scheduler: LLMScheduler) -> None:
     console.print("[bold cyan]Generate Schedule and Push to Google Calendar[/bold cyan]")
 
     # First, generate a schedule
-    api_key = llm_scheduler.config.get('api_key', '')
-    if not api_key:
-        console.print("[yellow]API key not set up yet.[/yellow]")
-        api_key = llm_scheduler.setup_api_key()
-        if not api_key:
-            prompt("\nPress Enter to continue... ")
-            return
-
-    console.print("[dim]Fetching today's Beeminder requirements...[/dim]")
-    requirements = llm_scheduler.beeminder_scheduler.calculate_requirements()
-
-    if not requirements:
-        console.print("[bold yellow]No scheduled goals found.[/bold yellow]")
-        console.print("[dim]Add goals for scheduling first before generating a schedule.[/dim]")
-        prompt("\nPress Enter to continue... ")
+    schedule = _generate_schedule(llm_scheduler)
+    if schedule is None:
         return
 
-    console.print(Panel(f"[bold]Found {len(requirements)} goals to schedule[/bold]", border_style="green"))
-
-    # Get start time
-    time_completer = WordCompleter(['9:00', '9:00 AM', '8:30', '8:00', '7:30', '7:00'])
-    now = datetime.now()
-    minutes = now.minute
-    rounded_minutes = ((minutes + 14) // 15) * 15
-    if rounded_minutes >= 60:
-        rounded_time = now.replace(hour=now.hour + 1, minute=0, second=0, microsecond=0)
-    else:
-        rounded_time = now.replace(minute=rounded_minutes, second=0, microsecond=0)
-    default_start_time = rounded_time.strftime("%I:%M %p").lstrip('0')
-
-    while True:
-        start_time = prompt(f"Start time for today's schedule (empty for {default_start_time}): ", completer=time_completer)
-        if not start_time:
-            start_time = default_start_time
-            break
-        if validate_time_format(start_time):
-            break
-        console.print("[yellow]Invalid time format. Try something like '9:00 AM' or '9:00'.[/yellow]")
-
-    end_time_completer = WordCompleter(['5:00 PM', '6:00 PM', '7:00 PM', '8:00 PM', '9:00 PM'])
-    while True:
-        end_time = prompt("End time (optional, press Enter to skip): ", completer=end_time_completer)
-        if not end_time or validate_time_format(end_time):
-            break
-        console.print("[yellow]Invalid time format. Try something like '5:00 PM' or '17:00'.[/yellow]")
-
-    console.print("\n[dim]Enter any preferences or context for your schedule.[/dim]")
-    console.print("[dim]Examples: 'I need a lunch break around noon', 'I have a meeting at 2PM'[/dim]")
-    console.print("[dim]Press Enter twice on an empty line when done.[/dim]")
-
-    preferences = []
-    while True:
-        line = prompt("> ", history=FileHistory(os.path.expanduser("~/.beeminder-preferences-history")))
-        if not line and (not preferences or not preferences[-1]):
-            break
-        preferences.append(line)
-
-    user_preferences = "\n".join(preferences)
-
-    console.print("\n[bold]Generating your schedule...[/bold]")
-    schedule = llm_scheduler.generate_schedule(
-        requirements,
-        start_time,
-        end_time if end_time else None,
-        user_preferences
-    )
-
-    # Save the generated schedule for later use
-    save_last_schedule(schedule)
-
-    display_schedule(schedule)
-
     # Authenticate with Google Calendar and get default calendar
     console.print("\n[bold]Preparing to push to Google Calendar...[/bold]")
 
     # Get calendar ID from config
-    config_file = os.path.expanduser("~/.beeminder-schedule.json")
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-    else:
-        config = {}
-
-    calendar_id = config.get('google_calendar_id', '')
-
-    # If no default calendar set, get calendar list and select one
-    gcal_api = GoogleCalendarAPI()
-    if not gcal_api.authenticate():
+    calendar_id = llm_scheduler.beeminder_scheduler.get_default_calendar()
+
+    # If no default calendar set, let the user select one
+    gcal_api = get_authenticated_api()
+    if gcal_api is None:
         console.print("[bold red]❌ Failed to authenticate with Google Calendar[/bold red]")
         console.print("[dim]Run 'gcal setup' first to configure Google Calendar access[/dim]")
         prompt("\nPress Enter to continue... ")
         return
 
-    if not calendar_id:
-        calendars = gcal_api.get_calendar_list()
+    # Fetched once: used both to pick a calendar and to name it below
+    calendars = gcal_api.get_calendar_list()
 
+    if not calendar_id:
         if not calendars:
             console.print("[yellow]No calendars found[/yellow]")
             prompt("\nPress Enter to continue... ")
@@ -306,13 +239,13 @@ def generate_and_push_to_calendar(llm_scheduler: LLMScheduler) -> None:
             table.add_row(
                 str(i),
                 calendar.get('id', ''),
-                calendar.get('summary', '')
+                Text(calendar.get('summary', ''))
             )
 
-        console.print(table)
+        print_table(table)
 
         calendar_choice = prompt("\nSelect calendar # to use: ",
-                               completer=WordCompleter([str(i) for i in range(1, len(calendars) + 1)]))
+                               completer=NumericRangeCompleter(len(calendars), start=1))
 
         if not calendar_choice.isdigit():
             console.print("[yellow]Invalid selection, operation cancelled.[/yellow]")
@@ -329,24 +262,19 @@ def generate_and_push_to_calendar(llm_scheduler: LLMScheduler) -> None:
 
         # Ask if they want to save this as default
         save_default = prompt("Save this as your default calendar? (yes/no): ",
-                            completer=WordCompleter(['yes', 'no']))
+                            completer=YES_NO_COMPLETER)
 
         if save_default.lower() == 'yes':
-            config['google_calendar_id'] = calendar_id
-            with open(config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            llm_scheduler.beeminder_scheduler.set_default_calendar(calendar_id)
             console.print("[green]✓ Saved as default calendar[/green]")
 
     # Confirm with user
-    calendar_name = "selected calendar"
-    for cal in gcal_api.get_calendar_list():
-        if cal.get('id') == calendar_id:
-            calendar_name = cal.get('summary', 'selected calendar')
-            break
+    calendar_names = {cal.get('id'): cal.get('summary', 'selected calendar') for cal in calendars}
+    calendar_name = calendar_names.get(calendar_id, "selected calendar")
 
-    console.print(f"\n[bold]Ready to push schedule to calendar:[/bold] [cyan]{calendar_name}[/cyan]")
+    console.print(f"\n[bold]Ready to push schedule to calendar:[/bold] [cyan]{escape(calendar_name)}[/cyan]")
     confirm = prompt("Confirm push to Google Calendar? (yes/no): ",
-                   completer=WordCompleter(['yes', 'no']))
+                   completer=YES_NO_COMPLETER)
 
     if confirm.lower() != 'yes':
         console.print("[yellow]Operation cancelled.[/yellow]")
@@ -6,19 +6,19 @@ Integrates with Gemini API to generate daily schedules based on Beeminder goals
 import os
 import json
 import re
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 from datetime import datetime
 import textwrap
 
 from openai import OpenAI
 from rich.console import Console
 from rich.panel import Panel
-from rich.markdown import Markdown
 from prompt_toolkit import prompt
-from prompt_toolkit.completion import WordCompleter
 
 from beeminder_api import BeeminderAPI
 from scheduler import BeeminderScheduler
+from schedule_utils import write_file_atomic
+from ui import YES_NO_COMPLETER
 
 console = Console()
 
@@ -31,14 +31,14 @@ class LLMScheduler:
         self.config = self._load_config()
 
     def _load_config(self) -> Dict:
-        if os.path.exists(self.config_file):
+        try:
             with open(self.config_file, 'r') as f:
                 return json.load(f)
-        return {'api_key': '', 'default_prompt': self._get_default_prompt()}
+        except FileNotFoundError:
+            return {'api_key': '', 'default_prompt': self._get_default_prompt()}
 
     def _save_config(self) -> None:
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        write_file_atomic(self.config_file, json.dumps(self.config, indent=2).encode())
 
     def _get_default_prompt(self) -> str:
         return textwrap.dedent("""\
@@ -137,7 +137,7 @@ class LLMScheduler:
         console.print(Panel(current_prompt, title="Current Prompt", border_style="cyan"))
 
         edit_choice = prompt("\nDo you want to edit this prompt? (yes/no): ",
-                           completer=WordCompleter(['yes', 'no']))
+                           completer=YES_NO_COMPLETER)
 
         if edit_choice.lower() != 'yes':
             return
@@ -4,18 +4,78 @@ Shared between interactive and LLM modules
 """
 
 import os
+import re
+import stat
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+# Matches the times of schedule lines like "9:00 AM - 10:30 AM: Activity (Goal)".
+# The rest of the line is taken whole and split by parse_schedule_line, since an
+# optional trailing group after a lazy match backtracks badly on long lines.
+TIME_PATTERN = re.compile(r'(\d{1,2}:\d{2} [AP]M)\s*-\s*(\d{1,2}:\d{2} [AP]M):\s*(.*)')
+
+def parse_schedule_line(line: str) -> Optional[Tuple[str, str, str, Optional[str]]]:
+    """Split a schedule line into (start, end, activity, goal); None if it has no time range.
+    The goal is a final parenthesised group without nested parentheses."""
+    match = TIME_PATTERN.search(line)
+    if not match:
+        return None
+
+    start_time, end_time, rest = match.groups()
+    rest = rest.rstrip()
+    if rest.endswith(')'):
+        open_at = rest.rfind('(')
+        if open_at != -1 and ')' not in rest[open_at:-1]:
+            return start_time, end_time, rest[:open_at].rstrip(), rest[open_at + 1:-1]
+    return start_time, end_time, rest, None
 
 # Path to store the last generated schedule
 LAST_SCHEDULE_FILE = os.path.expanduser("~/.beeminder-last-schedule.txt")
 
+def write_file_atomic(path: str, data: bytes) -> None:
+    """Replace a file's contents via a temp file, so an interrupted write can't truncate it.
+    Symlinks are written through and the file keeps its permissions (new files are private)."""
+    path = os.path.realpath(path)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o600
+
+    tmp_file = f"{path}.tmp"
+    with open(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), 'wb') as f:
+        f.write(data)
+    # The create mode is masked by the umask and ignored for a leftover temp file
+    os.chmod(tmp_file, mode)
+    os.replace(tmp_file, path)
+
+# Last schedule text read or written, with the file mtime it corresponds to
+_last_schedule_cache: tuple = (None, "")
+
 def save_last_schedule(schedule_text: str) -> None:
     """Save the last generated schedule to a file"""
+    global _last_schedule_cache
     with open(LAST_SCHEDULE_FILE, 'w') as f:
         f.write(schedule_text)
+    _last_schedule_cache = (os.stat(LAST_SCHEDULE_FILE).st_mtime_ns, schedule_text)
 
 def get_last_schedule() -> str:
-    """Get the last generated schedule from a file"""
-    if os.path.exists(LAST_SCHEDULE_FILE):
-        with open(LAST_SCHEDULE_FILE, 'r') as f:
-            return f.read()
-    return ""
+    """Get the last generated schedule from a file, re-reading it only when it has changed"""
+    global _last_schedule_cache
+    try:
+        mtime = os.stat(LAST_SCHEDULE_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return ""
+
+    if _last_schedule_cache[0] == mtime:
+        return _last_schedule_cache[1]
+
+    with open(LAST_SCHEDULE_FILE, 'r') as f:
+        schedule_text = f.read()
+    _last_schedule_cache = (mtime, schedule_text)
+    return schedule_text
+
+def default_start_time() -> str:
+    """Current time rounded up to the next quarter hour, e.g. '9:15 AM'"""
+    now = datetime.now().replace(second=0, microsecond=0)
+    rounded_time = now + timedelta(minutes=-now.minute % 15)
+    return rounded_time.strftime("%I:%M %p").lstrip('0')
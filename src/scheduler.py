@@ -10,6 +10,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from beeminder_api import BeeminderAPI
+from schedule_utils import write_file_atomic
 
 
 @dataclass
@@ -18,6 +19,7 @@ class ScheduledGoal:
     slug: str
     calendar_name: str
     hours_per_unit: float = 1.0  # How many hours per Beeminder unit
+    gunits: Optional[str] = None  # Beeminder's unit name, stored when the goal is added
 
 
 class BeeminderScheduler:
@@ -31,28 +33,31 @@ class BeeminderScheduler:
         self.api = api
         self.config_file = config_file or os.path.expanduser("~/.beeminder-schedule.json")
         self.config = self._load_config()
+        self._scheduled_goals: Optional[Dict[str, ScheduledGoal]] = None
 
     def _load_config(self) -> Dict:
         """Load configuration from file"""
-        if os.path.exists(self.config_file):
+        try:
             with open(self.config_file, 'r') as f:
                 return json.load(f)
-        return {'goals': {}, 'username': self.api.username}
+        except FileNotFoundError:
+            return {'goals': {}, 'username': self.api.username}
 
     def _save_config(self) -> None:
-        """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        """Save configuration to file, atomically so an interrupted save can't truncate it"""
+        self._scheduled_goals = None
+        write_file_atomic(self.config_file, json.dumps(self.config, indent=2).encode())
 
     def add_goal(self, slug: str, calendar_name: Optional[str] = None, hours_per_unit: float = 1.0) -> None:
         """Add a goal to be scheduled"""
         # Verify goal exists
-        self.api.get_goal(slug)
+        goal = self.api.get_goal(slug)
 
         goals = self.config.setdefault('goals', {})
         goals[slug] = {
             'calendar_name': calendar_name or slug,
-            'hours_per_unit': hours_per_unit
+            'hours_per_unit': hours_per_unit,
+            'gunits': goal.get('gunits')
         }
         self._save_config()
 
@@ -77,25 +82,41 @@ class BeeminderScheduler:
 
         self._save_config()
 
+    def get_default_calendar(self) -> str:
+        """Google Calendar ID schedules are pushed to ('' if none is set)"""
+        return self.config.get('google_calendar_id', '')
+
+    def set_default_calendar(self, calendar_id: str) -> None:
+        """Set the Google Calendar schedules are pushed to"""
+        self.config['google_calendar_id'] = calendar_id
+        self._save_config()
+
     def get_scheduled_goals(self) -> Dict[str, ScheduledGoal]:
-        """Get all goals configured for scheduling"""
+        """Get all goals configured for scheduling (cached until the config is saved)"""
+        if self._scheduled_goals is not None:
+            return self._scheduled_goals
+
         result = {}
         for slug, config in self.config.get('goals', {}).items():
             result[slug] = ScheduledGoal(
                 slug=slug,
                 calendar_name=config.get('calendar_name', slug),
-                hours_per_unit=config.get('hours_per_unit', 1.0)
+                hours_per_unit=config.get('hours_per_unit', 1.0),
+                gunits=config.get('gunits')
             )
+        self._scheduled_goals = result
         return result
 
     def calculate_requirements(self) -> Dict[str, Dict]:
         scheduled_goals = self.get_scheduled_goals()
         result = {}
-        current_time = datetime.now()
+        goals_data = self.api.get_goals_bulk(scheduled_goals.keys())
 
         for slug, goal in scheduled_goals.items():
             try:
-                goal_data = self.api.get_goal(slug)
+                goal_data = goals_data[slug]
+                if isinstance(goal_data, Exception):
+                    raise goal_data
                 losedate = goal_data.get('losedate', 0)
                 deadline = datetime.fromtimestamp(losedate) if losedate else datetime.now() + timedelta(days=365)
                 current_value = goal_data.get('curval')
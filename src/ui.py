@@ -3,34 +3,83 @@ UI Utilities for Beeminder Scheduler
 Common UI components and display functions
 """
 
-import re
-import os
 import json
-from typing import Dict, List
+import time
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import colorama
 from prompt_toolkit import prompt
+from prompt_toolkit.completion import Completer, Completion, WordCompleter
 from rich.markdown import Markdown
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 from rich import box
 
 from beeminder_api import BeeminderAPI
+from schedule_utils import parse_schedule_line, write_file_atomic
 
 # Initialize colorama for cross-platform colors
 colorama.init()
 
-# Setup rich console
-console = Console()
-
-def get_credentials(config_file: str) -> tuple:
-    """Get credentials from config or prompt"""
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+DATE_FORMAT = "%Y-%m-%d"
+
+# Setup rich console; no auto-highlighting, so cells skip the highlighter regexes
+console = Console(highlight=False)
+
+def print_table(table: Table, *footer: str) -> None:
+    """Render a table and any footer lines off-screen and write them to the terminal in one go"""
+    with console.capture() as capture:
+        console.print(table)
+        for line in footer:
+            console.print(line)
+    console.file.write(capture.get())
+    console.file.flush()
+
+# Last output per screen, together with the data it was rendered from
+_rendered: Dict[str, tuple] = {}
+
+def print_cached(screen: str, key: tuple, build: Callable[[], object]) -> None:
+    """Print the renderable from build(), reusing the screen's previous output while key compares equal"""
+    key = key + (console.size,)
+    last = _rendered.get(screen)
+    if last is not None and last[0] == key:
+        output = last[1]
     else:
-        config = {}
+        with console.capture() as capture:
+            console.print(build())
+        output = capture.get()
+        _rendered[screen] = (key, output)
+    console.file.write(output)
+    console.file.flush()
+
+YES_NO_COMPLETER = WordCompleter(['yes', 'no'])
+
+class NumericRangeCompleter(Completer):
+    """Completes the numbers start..upper without building a word list"""
+
+    def __init__(self, upper: int, start: int = 0):
+        self.start = start
+        self.upper = upper
+
+    def get_completions(self, document, complete_event):
+        prefix = document.text_before_cursor
+        if prefix and not prefix.isdigit():
+            return
+        for i in range(self.start, self.upper + 1):
+            word = str(i)
+            if word.startswith(prefix):
+                yield Completion(word, start_position=-len(prefix))
+
+def get_credentials(config_file: str, config: Optional[Dict] = None) -> tuple:
+    """Get credentials from config or prompt (config is read from config_file if not given)"""
+    if config is None:
+        try:
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            config = {}
 
     username = config.get('username')
     auth_token = config.get('auth_token')
@@ -57,8 +106,7 @@ def get_credentials(config_file: str) -> tuple:
         config['username'] = username
         config['auth_token'] = auth_token
 
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        write_file_atomic(config_file, json.dumps(config, indent=2).encode())
 
         console.print("[bold green]✓ Authentication successful! Your credentials have been saved.[/bold green]")
 
@@ -83,6 +131,11 @@ def display_goals(all_goals: List[Dict], scheduled_goals: Dict) -> None:
     table.add_column("Deadline", justify="center")
     table.add_column("Scheduled", justify="center")
 
+    # One clock read for the whole table; less than one / three days left as timestamps
+    now_ts = time.time()
+    red_cutoff = now_ts + 86400
+    yellow_cutoff = now_ts + 3 * 86400
+
     for goal in all_goals:
         slug = goal.get('slug')
         title = goal.get('title', '')
@@ -91,29 +144,29 @@ def display_goals(all_goals: List[Dict], scheduled_goals: Dict) -> None:
         target = f"{goal.get('goalval', 0):.1f}"
         units = goal.get('gunits', '')
 
-        deadline = datetime.fromtimestamp(goal.get('losedate', 0))
-        days_left = (deadline - datetime.now()).days
+        losedate = goal.get('losedate', 0)
 
         # Format deadline with color based on urgency
-        if days_left < 1:
-            deadline_str = f"[bold red]{deadline.strftime('%Y-%m-%d')}[/bold red]"
-        elif days_left < 3:
-            deadline_str = f"[yellow]{deadline.strftime('%Y-%m-%d')}[/yellow]"
+        if losedate < red_cutoff:
+            deadline_style = "bold red"
+        elif losedate < yellow_cutoff:
+            deadline_style = "yellow"
         else:
-            deadline_str = deadline.strftime("%Y-%m-%d")
+            deadline_style = ""
 
         # Show if goal is scheduled
-        scheduled_str = f"[bold green]✓[/bold green]" if slug in scheduled_goals else ""
+        scheduled_str = "✓" if slug in scheduled_goals else ""
 
+        # Cells are Text rather than markup strings, so titles with brackets print as-is
         table.add_row(
             slug,
-            title,
-            f"{current}/{target} {units}",
-            deadline_str,
-            scheduled_str
+            Text(title),
+            Text(f"{current}/{target} {units}"),
+            Text(time.strftime(DATE_FORMAT, time.localtime(losedate)), style=deadline_style),
+            Text(scheduled_str, style="bold green")
         )
 
-    console.print(table)
+    print_table(table)
 
 def display_scheduled_goals(goals: Dict) -> None:
     """Display scheduled goals in a rich table"""
@@ -137,11 +190,11 @@ def display_scheduled_goals(goals: Dict) -> None:
     for slug, goal in goals.items():
         table.add_row(
             slug,
-            goal.calendar_name,
+            Text(goal.calendar_name),
             f"{goal.hours_per_unit} hours per unit"
         )
 
-    console.print(table)
+    print_table(table)
 
 def display_requirements(requirements: Dict) -> None:
     if not requirements:
@@ -162,31 +215,28 @@ def display_requirements(requirements: Dict) -> None:
     for slug, data in requirements.items():
         if data.get('missing_data', False):
             continue
-        deadline_str = data['deadline'].strftime("%Y-%m-%d")
+        deadline_str = data['deadline'].strftime(DATE_FORMAT)
         hours = data['hours_needed']
         total_hours += hours
         row = [
-            data['calendar_name'],
+            Text(data['calendar_name']),
             f"{data.get('delta', 0):.1f}",  # Use 'delta' instead of 'units_needed'
             f"{hours:.1f}",
             deadline_str,
             f"{data['safebuf']}",
             f"${data['pledge']}",
-            data['limsum']
+            Text(data['limsum'])
         ]
         row.append(f"{data['hours_per_day']:.1f}")
         table.add_row(*row, style="red" if data['safebuf'] == 0 else None)
 
-    console.print(table)
-    console.print(f"[bold]Total hours needed today:[/bold] [cyan]{total_hours:.1f}[/cyan]")
+    print_table(table, f"[bold]Total hours needed today:[/bold] [cyan]{total_hours:.1f}[/cyan]")
 
 def display_schedule(schedule_text: str) -> None:
     """Display a schedule with elegant formatting and time calculations"""
     total_duration = timedelta()
     activity_durations = {}
 
-    time_pattern = r'(\d{1,2}:\d{2} [AP]M) - (\d{1,2}:\d{2} [AP]M): (.*?)(\((.*?)\))?$'
-
     for line in schedule_text.split('\n'):
         line = line.strip()
         if not line or line.startswith('#'):
@@ -196,9 +246,9 @@ def display_schedule(schedule_text: str) -> None:
         if line.startswith('- '):
             line = line[2:].strip()
 
-        match = re.search(time_pattern, line)
-        if match:
-            start_time_str, end_time_str, activity, _, goal_name = match.groups()
+        parsed = parse_schedule_line(line)
+        if parsed:
+            start_time_str, end_time_str, activity, goal_name = parsed
 
             # Parse start and end times
             try: